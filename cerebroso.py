@@ -1,17 +1,32 @@
 import asyncio
+import bisect
+import concurrent.futures
+import functools
+import hashlib
+import heapq
+import itertools
 import json
 import logging
+import mmap
+import operator
 import os
 import random
+import re
 import time
 from collections import defaultdict
-from datetime import datetime, timedelta, timezone
+from datetime import date, datetime, timedelta, timezone
+from types import MappingProxyType
 from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
 
 import discord
 from discord import app_commands
-from discord.ext import commands
+from discord.ext import commands, tasks
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 import config
 
@@ -24,6 +39,25 @@ DEFAULT_TIMEZONE = "UTC"
 
 DATA_DIR = os.path.join("data")
 DATA_FILE = os.path.join(DATA_DIR, "pomodoro_state.json")
+SAVE_DEBOUNCE_SECONDS = 0.25
+SAVE_MIN_INTERVAL_SECONDS = 2.0
+JOURNAL_COMPACT_SECONDS = 300
+JOURNAL_FSYNC_EVERY = 32
+SCHEDULER_RETRY_SECONDS = 30
+DM_CONCURRENCY = 10
+MEMBER_QUERY_LIMIT = 100
+DM_NOTICE_RETENTION_DAYS = 7
+SCHEDULER_MAX_SLEEP_SECONDS = 300
+ROTINA_SUMMARY_START = (23, 50)
+POMODORO_RETRY_SECONDS = 5
+PHASE_ICONS = {"foco": "🧠", "pausa_curta": "☕", "pausa_longa": "🛌"}
+PHASE_LABELS = {"foco": "foco", "pausa_curta": "pausa curta", "pausa_longa": "pausa longa"}
+FETCH_CACHE_TTL_SECONDS = 300
+FETCH_CACHE_MAX_ENTRIES = 1024
+# Padrão somente leitura para cadeias .get(...).get(...), sem criar um dict novo a cada acesso.
+_EMPTY: Any = MappingProxyType({})
+_DEFAULT_QUIET: Any = MappingProxyType({"start": "06:00", "end": "23:00"})
+_DM_STATUS_DEFAULTS: Any = MappingProxyType({"blocked": False, "next_check": 0})
 
 
 def ensure_data_dir() -> None:
@@ -42,62 +76,106 @@ def from_timestamp(ts: int) -> datetime:
     return datetime.fromtimestamp(ts, tz=timezone.utc)
 
 
+_today_cache: Dict[Tuple[Any, int, int], str] = {}
+
+
 def today_key(offset: int = 0, tz: Optional[ZoneInfo] = None) -> str:
-    reference = datetime.now(tz or timezone.utc)
-    return (reference.date() + timedelta(days=offset)).isoformat()
+    # Os fusos mudam de offset em minutos inteiros, então a data local só vira na troca de minuto.
+    now = time.time()
+    key = (tz, int(now) // 60, offset)
+    cached = _today_cache.get(key)
+    if cached is not None:
+        return cached
+    if len(_today_cache) >= 16:
+        _today_cache.clear()
+    reference = datetime.fromtimestamp(now, tz or timezone.utc)
+    cached = _today_cache[key] = (reference.date() + timedelta(days=offset)).isoformat()
+    return cached
+
+
+HHMM_RE = re.compile(r"\s*(\d+)\s*:\s*(\d+)\s*")
 
 
 def parse_hhmm(text: str) -> Optional[Tuple[int, int]]:
-    try:
-        hour, minute = text.split(":", 1)
-        hour_i = int(hour)
-        minute_i = int(minute)
-    except (ValueError, AttributeError):
+    match = HHMM_RE.fullmatch(text) if isinstance(text, str) else None
+    if not match:
         return None
+    hour_i = int(match[1])
+    minute_i = int(match[2])
     if 0 <= hour_i < 24 and 0 <= minute_i < 60:
         return hour_i, minute_i
     return None
 
 
+DATETIME_OPTION_RE = re.compile(
+    r"\+(?P<amount>\d+)(?P<unit>[mhd])"
+    r"|(?P<hour>\d{1,2}):(?P<minute>\d{1,2})"
+    r"|(?P<year>\d{4})-(?P<month>\d{1,2})-(?P<day>\d{1,2})\s+(?P<at_hour>\d{1,2}):(?P<at_minute>\d{1,2})",
+    re.IGNORECASE,
+)
+DELTA_UNITS = {"m": "minutes", "h": "hours", "d": "days"}
+
+
+@functools.lru_cache(maxsize=256)
+def hhmm_to_minutes(text: str) -> Optional[int]:
+    hhmm = parse_hhmm(text)
+    if not hhmm:
+        return None
+    return hhmm[0] * 60 + hhmm[1]
+
+
+@functools.lru_cache(maxsize=1024)
+def day_key_to_ordinal(day: str) -> int:
+    return datetime.fromisoformat(day).date().toordinal()
+
+
+@functools.lru_cache(maxsize=256)
+def zoneinfo_for(tz_name: str) -> ZoneInfo:
+    try:
+        return ZoneInfo(tz_name)
+    except (ZoneInfoNotFoundError, ValueError):
+        logging.warning("Fuso horário inválido armazenado: %s. Revertendo para UTC.", tz_name)
+        return ZoneInfo(DEFAULT_TIMEZONE)
+
+
 def parse_datetime_option(text: str, tz: ZoneInfo) -> Optional[int]:
-    text = text.strip()
+    match = DATETIME_OPTION_RE.fullmatch(text.strip())
+    if not match:
+        return None
     now = datetime.now(tz)
-    if text.startswith("+"):
-        number = text[1:-1]
-        suffix = text[-1].lower()
-        try:
-            amount = int(number)
-        except ValueError:
-            return None
-        if suffix == "m":
-            delta = timedelta(minutes=amount)
-        elif suffix == "h":
-            delta = timedelta(hours=amount)
-        elif suffix == "d":
-            delta = timedelta(days=amount)
-        else:
-            return None
-        return to_timestamp((now + delta).astimezone(timezone.utc))
-    hhmm = parse_hhmm(text)
-    if hhmm:
-        hour, minute = hhmm
-        dt = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
-        if dt < now:
-            dt += timedelta(days=1)
-        return to_timestamp(dt.astimezone(timezone.utc))
     try:
-        date_part, time_part = text.split()
-        year, month, day = map(int, date_part.split("-"))
-        hour, minute = map(int, time_part.split(":"))
-        dt = datetime(year, month, day, hour, minute, tzinfo=tz)
+        if match["amount"]:
+            delta = timedelta(**{DELTA_UNITS[match["unit"].lower()]: int(match["amount"])})
+            return to_timestamp((now + delta).astimezone(timezone.utc))
+        if match["hour"]:
+            hour, minute = int(match["hour"]), int(match["minute"])
+            if hour >= 24 or minute >= 60:
+                return None
+            dt = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+            if dt < now:
+                dt += timedelta(days=1)
+            return to_timestamp(dt.astimezone(timezone.utc))
+        dt = datetime(
+            int(match["year"]),
+            int(match["month"]),
+            int(match["day"]),
+            int(match["at_hour"]),
+            int(match["at_minute"]),
+            tzinfo=tz,
+        )
         return to_timestamp(dt.astimezone(timezone.utc))
-    except Exception:
+    except (OverflowError, ValueError):
         return None
 
 
 def end_of_day_ts(tz: ZoneInfo) -> int:
-    now_local = datetime.now(tz)
-    next_day = now_local.date() + timedelta(days=1)
+    return _end_of_day_for(tz, today_key(tz=tz))
+
+
+@functools.lru_cache(maxsize=256)
+def _end_of_day_for(tz: ZoneInfo, day: str) -> int:
+    # O fim do dia só depende do fuso e da data local, ambos já resolvidos em today_key.
+    next_day = date.fromisoformat(day) + timedelta(days=1)
     end_local = datetime(next_day.year, next_day.month, next_day.day, tzinfo=tz)
     return to_timestamp(end_local.astimezone(timezone.utc))
 
@@ -115,6 +193,7 @@ def hhmm_list_from_csv(csv: Optional[str]) -> Optional[List[str]]:
     return values
 
 
+@functools.lru_cache(maxsize=4096)
 def seconds_to_human(seconds: int) -> str:
     minutes, secs = divmod(max(0, seconds), 60)
     hours, minutes = divmod(minutes, 60)
@@ -128,7 +207,7 @@ def seconds_to_human(seconds: int) -> str:
     return " ".join(parts) if parts else "0s"
 
 
-CUTE_MESSAGES = [
+CUTE_MESSAGES = (
     "Você é incrível!",
     "Mandou bem demais!",
     "Orgulho de você!",
@@ -139,7 +218,81 @@ CUTE_MESSAGES = [
     "Mais um passo rumo ao sucesso!",
     "Uau! Isso foi ótimo!",
     "Vitória do dia conquistada!",
-]
+)
+
+
+def _cute_message_cycle() -> Iterator[str]:
+    # Cada rodada é uma permutação nova; a troca na virada evita repetir a última mensagem.
+    rng = random.Random()
+    last = None
+    while True:
+        bag = rng.sample(CUTE_MESSAGES, len(CUTE_MESSAGES))
+        if bag[0] == last:
+            bag[0], bag[-1] = bag[-1], bag[0]
+        yield from bag
+        last = bag[-1]
+
+
+pick_cute_message = functools.partial(next, _cute_message_cycle())
+
+
+CEREBROSO_HELP_TITLE = "🧠✨ Cerebroso — seu companheiro de foco e autocuidado!"
+CEREBROSO_HELP_DESCRIPTION = (
+    "O Cerebroso é o bot do Ninho que te ajuda a **criar hábitos saudáveis**, "
+    "**lembrar de cuidar de si** e **manter o foco** — tudo de um jeitinho leve e acolhedor 💛\n\n"
+    "Use **`/cerebroso`** pra ver o guia completo direto no Discord."
+)
+CEREBROSO_HELP_FIELDS = (
+    (
+        "🍅 Pomodoro de Canal — modo foco em grupo",
+        (
+            "Precisa de companhia pra se concentrar?\n"
+            "O comando `/pomodoro iniciar` abre uma sessão de foco no canal.\n"
+            "Você pode **participar**, **pausar** ou **ver o status** da sessão.\n\n"
+            "💡 Trabalhe em blocos de tempo, com pausas entre eles — perfeito pra cérebro TDAH!"
+        ),
+    ),
+    (
+        "⏰ Lembretes pessoais — cuide de si no seu ritmo",
+        (
+            "Receba lembretes por DM pra não esquecer do básico:\n"
+            "`/lembrete criar texto:'Beber água' quando:'+45m'`\n"
+            "`/lembrete listar` • `/lembrete cancelar id:1`\n\n"
+            "🕒 Use tempos como `+10m`, `+2h` ou `18:00`. Ideal pra lembrar de pausas, remédios ou autocuidado."
+        ),
+    ),
+    (
+        "🌱 Hábitos pessoais — pequenas metas diárias",
+        (
+            "Acompanhe seus hábitos com carinho!\n"
+            "`/habito criar nome:'Água' meta:8 intervalo_minutos:60 emoji:'💧'`\n"
+            "`/habito listar` • `/habito marcar id:1`\n\n"
+            "💧 Cada vez que marcar, o Cerebroso te manda uma mensagem fofa de incentivo 🩷"
+        ),
+    ),
+    (
+        "🌼 Rotinas da Comunidade — cuidando juntinhos",
+        (
+            "Rotinas compartilhadas aparecem no canal do dia com um botão **Fiz!** ✨\n"
+            "`/rotina listar` — veja as rotinas disponíveis\n"
+            "`/rotina entrar nome:'Escovar os dentes' intervalo_minutos:90 dm:true`\n"
+            "`/rotina preferencias nome:'Escovar os dentes' janela_inicio:08:00 janela_fim:22:00`\n"
+            "`/rotina leaderboard` — ranking geral\n"
+            "`/rotina leaderboard nome:'Escovar os dentes'` — ranking da rotina específica\n\n"
+            "🎖️ Confirmar pausa seus lembretes até o dia seguinte. Cada check é uma conquista!"
+        ),
+    ),
+    (
+        "📚 Exemplos rápidos",
+        (
+            "`/pomodoro iniciar`\n"
+            "`/lembrete criar texto:'Alongar' quando:'18:00'`\n"
+            "`/habito criar nome:'Leitura' meta:1 intervalo_minutos:120 emoji:'📚'`\n"
+            "`/rotina entrar nome:'Escovar os dentes' intervalo_minutos:60 dm:true`"
+        ),
+    ),
+)
+CEREBROSO_HELP_FOOTER = "🌿 O Cerebroso não cobra — ele te apoia. Cada passinho já é progresso 💛"
 
 
 def default_state() -> Dict[str, Any]:
@@ -153,51 +306,311 @@ def default_state() -> Dict[str, Any]:
             "default_timezone": DEFAULT_TIMEZONE,
             "guild_timezones": {},
             "user_timezones": {},
+            "command_sync_hashes": {},
         },
         "dm_status": {},
         "rotina_summaries": {},
+        "_journal_seq": 0,
     }
 
 
+def prune_dm_notices(notified: Dict[str, Any], limits: Dict[str, Any], now_ts: int) -> None:
+    # Avisos antigos não influenciam mais nada; sem a poda o estado cresce a cada canal.
+    cutoff_ts = now_ts - DM_NOTICE_RETENTION_DAYS * 86400
+    cutoff = datetime.fromtimestamp(cutoff_ts, timezone.utc).date().isoformat()
+    for key, info in list(notified.items()):
+        if isinstance(info, dict):
+            if str(info.get("date", "")) < cutoff:
+                del notified[key]
+        elif int(info or 0) < cutoff_ts:
+            del notified[key]
+    for key in list(limits):
+        if key.rpartition(":")[2] < cutoff:
+            del limits[key]
+
+
+def session_participants(session: Dict[str, Any]) -> Set[int]:
+    # Em memória os participantes ficam num set; só viram lista ao serializar.
+    participants = session.get("participants")
+    if not isinstance(participants, set):
+        participants = set(participants or [])
+        session["participants"] = participants
+    return participants
+
+
+def habit_today_count(habit: Dict[str, Any], today: str) -> int:
+    if habit.get("today_key") != today:
+        return 0
+    return int(habit.get("today_count", 0))
+
+
+def add_habit_progress(habit: Dict[str, Any], today: str, quantity: int) -> int:
+    # Só o dia corrente é lido; o contador zera quando a data vira.
+    if habit.get("today_key") != today:
+        habit["today_key"] = today
+        habit["today_count"] = 0
+    habit["today_count"] = int(habit.get("today_count", 0)) + quantity
+    return habit["today_count"]
+
+
+def compact_habit_progress(habit: Dict[str, Any]) -> None:
+    # Estados antigos guardavam {"YYYY-MM-DD": n} para sempre; só o dia mais recente pode ser "hoje".
+    progress = habit.pop("progress", None)
+    if isinstance(progress, dict) and progress and "today_key" not in habit:
+        last_day = max(progress)
+        habit["today_key"] = last_day
+        habit["today_count"] = int(progress[last_day])
+
+
+def normalize_streak_roles(rotina: Dict[str, Any]) -> None:
+    # "days" vira int uma vez na carga; os caminhos quentes comparam direto, sem int(...).
+    achievements = rotina.get("achievements")
+    streak_roles = achievements.get("streak_roles") if isinstance(achievements, dict) else None
+    if not isinstance(streak_roles, list):
+        return
+    normalized = []
+    for entry in streak_roles:
+        try:
+            entry["days"] = int(entry.get("days", 0))
+        except (AttributeError, TypeError, ValueError):
+            continue
+        normalized.append(entry)
+    normalized.sort(key=operator.itemgetter("days"))
+    streak_roles[:] = normalized
+
+
+def pomodoro_remaining(session: Dict[str, Any], now_ts: int) -> int:
+    # "remaining" vale para o instante "last_ts"; enquanto roda, o tempo corre a partir dali.
+    remaining = int(session.get("remaining", 0))
+    if session.get("active") and not session.get("paused"):
+        remaining -= now_ts - int(session.get("last_ts", now_ts))
+    return max(0, remaining)
+
+
+def settle_pomodoro(session: Dict[str, Any], now_ts: int) -> None:
+    session["remaining"] = pomodoro_remaining(session, now_ts)
+    session["last_ts"] = now_ts
+
+
+def _json_default(obj: Any) -> Any:
+    if isinstance(obj, set):
+        return sorted(obj)
+    raise TypeError
+
+
+def json_dumps(obj: Any, sort_keys: bool = False) -> bytes:
+    # orjson quando instalado; o json da stdlib garante que o bot roda sem ele.
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+        return orjson.dumps(obj, default=_json_default, option=option)
+    text = json.dumps(obj, default=_json_default, ensure_ascii=False, separators=(",", ":"), sort_keys=sort_keys)
+    return text.encode("utf-8")
+
+
+def json_loads(data: Any) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(bytes(data))
+
+
 class JsonStore:
     def __init__(self, path: str) -> None:
         self.path = path
+        self.journal_path = f"{os.path.splitext(path)[0]}.log"
         self.lock = asyncio.Lock()
         self._data: Dict[str, Any] = default_state()
+        self._dirty = asyncio.Event()
+        self._flush_task: Optional[asyncio.Task[None]] = None
+        self._closing = False
+        self._journal_fd: Optional[int] = None
+        self._journal_seq = 0
+        self._journal_unsynced = 0
+        self._snapshot_seq = 0
+        self._last_payload: Optional[bytes] = None
+        self._last_save_at = 0.0
+        self._io_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="cerebroso-io")
+        self._closed = False
 
     async def load(self) -> None:
         ensure_data_dir()
-        if not os.path.exists(self.path):
-            await self.save()
-            return
         loop = asyncio.get_running_loop()
+        exists = os.path.exists(self.path)
+        if exists:
+            try:
+                data = await loop.run_in_executor(self._io_executor, self._read_snapshot)
+                if data is not None:
+                    self._data = data
+            except Exception as exc:
+                logging.exception("Falha ao carregar estado JSON: %s", exc)
+        self._snapshot_seq = self._journal_seq = int(self._data.get("_journal_seq", 0))
         try:
-            data = await loop.run_in_executor(None, self._read_file)
-            if isinstance(data, dict):
-                self._data = self._merge_default(data)
-        except Exception as exc:
-            logging.exception("Falha ao carregar estado JSON: %s", exc)
+            entries = await loop.run_in_executor(self._io_executor, self._read_journal)
+        except Exception:
+            logging.exception("Falha ao ler o journal de estado")
+            entries = []
+        for entry in entries:
+            seq = int(entry.get("seq", 0))
+            if seq <= self._snapshot_seq:
+                continue
+            try:
+                self._apply_op(entry)
+            except Exception:
+                logging.exception("Falha ao reaplicar operação do journal: %s", entry)
+            self._journal_seq = max(self._journal_seq, seq)
+        for channel_data in self._data.get("channels", {}).values():
+            if channel_data.get("session"):
+                session_participants(channel_data["session"])
+        if not exists:
+            await self.save()
+
+    def _read_snapshot(self) -> Optional[Dict[str, Any]]:
+        data = self._read_file()
+        if not isinstance(data, dict):
+            return None
+        return self._merge_default(data)
 
     def _read_file(self) -> Dict[str, Any]:
-        with open(self.path, "r", encoding="utf-8") as fp:
-            return json.load(fp)
+        with open(self.path, "rb") as fp:
+            if os.fstat(fp.fileno()).st_size == 0:
+                return {}
+            with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+                return json_loads(view)
+
+    def _read_journal(self) -> List[Dict[str, Any]]:
+        if not os.path.exists(self.journal_path):
+            return []
+        entries = []
+        with open(self.journal_path, "rb") as fp:
+            for line in fp:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json_loads(line)
+                except ValueError:
+                    logging.warning("Linha inválida ignorada no journal de estado")
+                    continue
+                if isinstance(entry, dict):
+                    entries.append(entry)
+        return entries
+
+    def _apply_op(self, entry: Dict[str, Any]) -> None:
+        op = entry.get("op")
+        if op == "reminder_delivered":
+            for reminder in self._data.get("reminders", []):
+                if reminder.get("id") == entry["id"]:
+                    reminder["delivered"] = True
+                    break
+        elif op == "rotina_confirmed":
+            for rotina in self._data.get("global_habits", []):
+                if rotina.get("id") == entry["rotina_id"]:
+                    confirmations = rotina.setdefault("confirmations", {}).setdefault(entry["date"], {})
+                    confirmations[str(entry["user_id"])] = True
+                    break
+        elif op == "rotina_updated":
+            rotina = self._rotina_data(entry["rotina_id"])
+            if rotina is not None:
+                rotina.update(entry["fields"])
+        elif op == "rotina_deleted":
+            rotina = self._rotina_data(entry["rotina_id"])
+            if rotina is not None:
+                self._data["global_habits"].remove(rotina)
+        elif op in ("enrollment_set", "enrollment_removed"):
+            rotina = self._rotina_data(entry["rotina_id"])
+            if rotina is None:
+                return
+            enrollments = rotina.setdefault("enrollments", {})
+            if op == "enrollment_set":
+                enrollments[str(entry["user_id"])] = entry["prefs"]
+            else:
+                enrollments.pop(str(entry["user_id"]), None)
+        elif op == "dm_status_set":
+            self._data.setdefault("dm_status", {})[str(entry["user_id"])] = entry["status"]
+        elif op in ("pomodoro_join", "pomodoro_leave"):
+            channel_data = self._data.get("channels", _EMPTY).get(str(entry["channel_id"]))
+            if channel_data is None:
+                return
+            session = channel_data.get("session") or {}
+            if op == "pomodoro_join":
+                session_participants(session).add(entry["user_id"])
+            else:
+                session_participants(session).discard(entry["user_id"])
+            channel_data["session"] = session
+        else:
+            logging.warning("Operação desconhecida no journal: %s", op)
+
+    def _rotina_data(self, rotina_id: int) -> Optional[Dict[str, Any]]:
+        for rotina in self._data.get("global_habits", []):
+            if rotina.get("id") == rotina_id:
+                return rotina
+        return None
+
+    def append_op(self, op: str, **fields: Any) -> None:
+        self._journal_seq += 1
+        line = json_dumps({"seq": self._journal_seq, "op": op, **fields}) + b"\n"
+        if self._closed:
+            # Handler que terminou durante o desligamento: sem executor nem flusher, grava e sincroniza aqui.
+            try:
+                with open(self.journal_path, "ab") as fh:
+                    fh.write(line)
+                    os.fsync(fh.fileno())
+            except OSError:
+                logging.exception("Falha ao gravar no journal após o fechamento")
+            return
+        try:
+            if self._journal_fd is None:
+                ensure_data_dir()
+                self._journal_fd = os.open(self.journal_path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+            os.write(self._journal_fd, line)
+        except OSError:
+            logging.exception("Falha ao gravar no journal; salvando o estado completo")
+            self._dirty.set()
+            return
+        # fsync em lote e fora do loop: limita o que um desligamento brusco pode perder.
+        self._journal_unsynced += 1
+        if self._journal_unsynced >= JOURNAL_FSYNC_EVERY:
+            self._journal_unsynced = 0
+            self._io_executor.submit(self._fsync_journal, self._journal_fd)
+
+    @staticmethod
+    def _fsync_journal(fd: int) -> None:
+        try:
+            os.fsync(fd)
+        except OSError:
+            logging.exception("Falha ao sincronizar o journal de estado")
+
+    def _truncate_journal(self) -> None:
+        if self._journal_fd is not None:
+            os.ftruncate(self._journal_fd, 0)
+        elif os.path.exists(self.journal_path):
+            os.truncate(self.journal_path, 0)
 
     def _merge_default(self, loaded: Dict[str, Any]) -> Dict[str, Any]:
-        base = default_state()
-        for key in base.keys():
-            base[key] = loaded.get(key, base[key])
-        base.setdefault("_next_ids", {}).update(loaded.get("_next_ids", {}))
-        if isinstance(loaded.get("settings"), dict):
-            base_settings = base.setdefault("settings", {})
-            loaded_settings = loaded.get("settings", {})
-            base_settings["default_timezone"] = loaded_settings.get(
-                "default_timezone", base_settings.get("default_timezone", DEFAULT_TIMEZONE)
-            )
-            if isinstance(loaded_settings.get("guild_timezones"), dict):
-                base_settings.setdefault("guild_timezones", {}).update(loaded_settings.get("guild_timezones", {}))
-            if isinstance(loaded_settings.get("user_timezones"), dict):
-                base_settings.setdefault("user_timezones", {}).update(loaded_settings.get("user_timezones", {}))
-        return base
+        defaults = default_state()
+        for key, value in defaults.items():
+            loaded.setdefault(key, value)
+        for key in ("_next_ids", "settings"):
+            if not isinstance(loaded[key], dict):
+                loaded[key] = defaults[key]
+                continue
+            for sub_key, value in defaults[key].items():
+                loaded[key].setdefault(sub_key, value)
+        # Entradas de DM completas desde a carga; o caminho quente só faz um get.
+        status_map = loaded["dm_status"] if isinstance(loaded["dm_status"], dict) else {}
+        loaded["dm_status"] = {
+            user_id: {
+                **_DM_STATUS_DEFAULTS,
+                **entry,
+                "notified": entry.get("notified") or {},
+                "daily_limit": entry.get("daily_limit") or {},
+            }
+            for user_id, entry in status_map.items()
+            if isinstance(entry, dict)
+        }
+        now_ts = int(time.time())
+        for entry in loaded["dm_status"].values():
+            prune_dm_notices(entry["notified"], entry["daily_limit"], now_ts)
+        return loaded
 
     async def save(self) -> None:
         async with self.lock:
@@ -205,37 +618,159 @@ class JsonStore:
 
     async def _save_locked(self) -> None:
         loop = asyncio.get_running_loop()
-        await loop.run_in_executor(None, self._write_file, self._data)
+        seq = self._journal_seq
+        self._data["_journal_seq"] = seq
+        # Serializa no loop: a thread de I/O nunca percorre o dict enquanto handlers o alteram.
+        payload = json_dumps(self._data)
+        # Flush disparado sem mudança real (ex.: mark_dirty redundante): o arquivo já está igual.
+        if payload != self._last_payload:
+            await loop.run_in_executor(self._io_executor, self._write_file, payload)
+            self._last_payload = payload
+        self._snapshot_seq = seq
+        if seq == self._journal_seq:
+            try:
+                self._truncate_journal()
+            except OSError:
+                logging.exception("Falha ao compactar o journal de estado")
 
-    def _write_file(self, data: Dict[str, Any]) -> None:
-        ensure_data_dir()
+    def _write_file(self, payload: bytes) -> None:
+        # O diretório é criado em load(); aqui só abre, grava e troca o arquivo.
         tmp_path = f"{self.path}.tmp"
-        with open(tmp_path, "w", encoding="utf-8") as fp:
-            json.dump(data, fp, indent=2, ensure_ascii=False)
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            # os.write pode gravar só parte do buffer; segue a partir do que faltou sem copiar bytes.
+            view = memoryview(payload)
+            while view:
+                view = view[os.write(fd, view):]
+            # Dados no disco antes do rename: um crash nunca deixa o snapshot novo vazio ou pela metade.
+            os.fsync(fd)
+        finally:
+            os.close(fd)
         os.replace(tmp_path, self.path)
 
     @property
     def data(self) -> Dict[str, Any]:
         return self._data
 
-    async def save_data(self) -> None:
+    def mark_dirty(self) -> None:
+        self._dirty.set()
+
+    async def flush(self) -> None:
+        # Grava agora, sem esperar o debounce; uma passada pendente do flusher vira no-op.
+        self._dirty.clear()
         await self.save()
 
+    def start_flusher(self) -> None:
+        if self._flush_task is None:
+            self._flush_task = asyncio.get_running_loop().create_task(self._flusher())
+
+    async def _flusher(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._dirty.wait(), timeout=JOURNAL_COMPACT_SECONDS)
+            except asyncio.TimeoutError:
+                if self._journal_seq == self._snapshot_seq:
+                    continue
+            if not self._closing:
+                # O journal já garante durabilidade; o snapshot inteiro sai no máximo a cada intervalo.
+                wait = max(SAVE_DEBOUNCE_SECONDS, self._last_save_at + SAVE_MIN_INTERVAL_SECONDS - time.monotonic())
+                await asyncio.sleep(wait)
+            self._dirty.clear()
+            try:
+                await self.save()
+            except Exception:
+                logging.exception("Falha ao salvar estado JSON")
+            self._last_save_at = time.monotonic()
+            # No fechamento, só sai quando nada ficou sujo durante a última gravação.
+            if self._closing and not self._dirty.is_set():
+                return
+
+    async def close(self) -> None:
+        task = self._flush_task
+        if task is None:
+            return
+        self._flush_task = None
+        self._closing = True
+        self._dirty.set()
+        await task
+        self._closed = True
+        if self._journal_fd is not None:
+            fd, self._journal_fd = self._journal_fd, None
+            # Fecha na thread de I/O, depois de qualquer fsync ainda na fila.
+            await asyncio.get_running_loop().run_in_executor(self._io_executor, os.close, fd)
+        self._io_executor.shutdown(wait=False)
+
+
+class DueHeap:
+    """Min-heap de prazos com invalidação preguiçosa: reagendar só empilha uma nova entrada."""
+
+    def __init__(self) -> None:
+        self._heap: List[Tuple[int, int, Any]] = []
+        self._entries: Dict[Any, Tuple[int, int, Any]] = {}
+        self._counter = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def schedule(self, key: Any, ts: int, item: Any) -> None:
+        count = next(self._counter)
+        self._entries[key] = (ts, count, item)
+        heapq.heappush(self._heap, (ts, count, key))
+        if len(self._heap) > 2 * len(self._entries) + 64:
+            self._heap = [(ts, count, key) for key, (ts, count, _) in self._entries.items()]
+            heapq.heapify(self._heap)
+
+    def discard(self, key: Any) -> None:
+        self._entries.pop(key, None)
+
+    def get(self, key: Any) -> Any:
+        entry = self._entries.get(key)
+        return entry[2] if entry is not None else None
+
+    def items(self) -> List[Any]:
+        return [entry[2] for entry in self._entries.values()]
+
+    def clear(self) -> None:
+        self._heap.clear()
+        self._entries.clear()
+
+    def _prune(self) -> None:
+        heap = self._heap
+        while heap:
+            _, count, key = heap[0]
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] == count:
+                return
+            heapq.heappop(heap)
+
+    def next_ts(self) -> Optional[int]:
+        self._prune()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now_ts: int) -> List[Any]:
+        due = []
+        while True:
+            self._prune()
+            if not self._heap or self._heap[0][0] > now_ts:
+                return due
+            _, _, key = heapq.heappop(self._heap)
+            due.append(self._entries.pop(key)[2])
+
 
 class PomodoroView(discord.ui.View):
-    def __init__(self, bot: "CerebrosoBot", channel_id: int) -> None:
+    # Persistente: uma única instância atende todos os canais, que vêm da própria interação.
+    def __init__(self, bot: "CerebrosoBot") -> None:
         super().__init__(timeout=None)
         self.bot = bot
-        self.channel_id = channel_id
 
     @discord.ui.button(label="Participar", style=discord.ButtonStyle.success, custom_id="pomodoro_join")
     async def join(self, interaction: discord.Interaction, button: discord.ui.Button) -> None:  # type: ignore[override]
-        await self.bot.add_pomodoro_participant(self.channel_id, interaction.user.id)
+        await self.bot.add_pomodoro_participant(interaction.channel_id, interaction.user.id)
         await interaction.response.send_message("Você entrou no ciclo Pomodoro deste canal!", ephemeral=True)
 
     @discord.ui.button(label="Sair", style=discord.ButtonStyle.danger, custom_id="pomodoro_leave")
     async def leave(self, interaction: discord.Interaction, button: discord.ui.Button) -> None:  # type: ignore[override]
-        await self.bot.remove_pomodoro_participant(self.channel_id, interaction.user.id)
+        await self.bot.remove_pomodoro_participant(interaction.channel_id, interaction.user.id)
         await interaction.response.send_message("Você saiu do ciclo Pomodoro deste canal.", ephemeral=True)
 
 
@@ -255,7 +790,7 @@ class RotinaButton(discord.ui.View):
             self.date_key,
             guild_id=interaction.guild_id,
         )
-        await interaction.response.send_message(random.choice(CUTE_MESSAGES), ephemeral=True)
+        await interaction.response.send_message(pick_cute_message(), ephemeral=True)
 
 
 class RotinaDMView(discord.ui.View):
@@ -288,7 +823,7 @@ class RotinaDMView(discord.ui.View):
             today_key(tz=self.tz),
             guild_id=interaction.guild_id,
         )
-        await interaction.response.send_message(random.choice(CUTE_MESSAGES), ephemeral=True)
+        await interaction.response.send_message(pick_cute_message(), ephemeral=True)
 
     @discord.ui.button(label="Não vou fazer hoje", style=discord.ButtonStyle.secondary, custom_id="rotina_skip")
     async def skip_today(self, interaction: discord.Interaction, button: discord.ui.Button) -> None:  # type: ignore[override]
@@ -317,6 +852,37 @@ class CerebrosoBot(commands.Bot):
         super().__init__(command_prefix="!", intents=intents, application_id=None)
         self.store = JsonStore(DATA_FILE)
         self.bg_tasks: List[asyncio.Task[Any]] = []
+        # Tarefas avulsas (ex.: cargos de rotina) ficam referenciadas até terminar.
+        self._spawned_tasks: Set[asyncio.Task[Any]] = set()
+        self._reminder_schedule = DueHeap()
+        self._habit_schedule = DueHeap()
+        self._rotina_dm_schedule = DueHeap()
+        self._announcement_schedule = DueHeap()
+        self._pomodoro_schedule = DueHeap()
+        self._pomodoro_wake = asyncio.Event()
+        self._scheduler_wake = asyncio.Event()
+        self._summary_not_before = 0.0
+        self._summary_done: Dict[int, Tuple[str, int]] = {}
+        self._confirmation_version = 0
+        self._guild_tz: Dict[int, ZoneInfo] = {}
+        self._user_tz: Dict[int, ZoneInfo] = {}
+        self._default_tz = zoneinfo_for(DEFAULT_TIMEZONE)
+        self._dm_semaphore = asyncio.Semaphore(DM_CONCURRENCY)
+        self._habits_by_id: Dict[int, Dict[str, Any]] = {}
+        self._habit_msg_index: Dict[Tuple[int, str], Dict[str, Any]] = {}
+        self._rotina_by_message: Dict[int, Tuple[Dict[str, Any], str]] = {}
+        # Dia mais recente já indexado; ao virar, anúncios antigos saem do índice de reações.
+        self._rotina_index_day = ""
+        self._tracked_message_ids: Set[int] = set()
+        self._rotina_by_id: Dict[int, Dict[str, Any]] = {}
+        self._rotina_by_name: Dict[str, Dict[str, Any]] = {}
+        self._rotina_names: List[Tuple[str, int]] = []
+        self._enrollments_by_user: Dict[str, Set[int]] = defaultdict(set)
+        self._rotina_times_cache: Dict[int, Tuple[Any, Dict[int, List[str]]]] = {}
+        self._rotina_month_counts: Dict[int, Dict[str, Dict[int, int]]] = {}
+        self._rotina_streaks: Dict[int, Dict[int, Tuple[str, int]]] = {}
+        self._rotina_stats_cache: Dict[int, Tuple[date, List[Tuple[int, Dict[str, int]]]]] = {}
+        self._fetch_cache: Dict[Tuple[Optional[int], int], Tuple[float, Any]] = {}
 
         self.pomodoro_group = app_commands.Group(name="pomodoro", description="Pomodoro de canal")
         self.lembrete_group = app_commands.Group(name="lembrete", description="Lembretes pessoais por DM")
@@ -332,92 +898,117 @@ class CerebrosoBot(commands.Bot):
         self._general_commands: List[app_commands.Command] = []
 
         self._register_commands()
+        self._add_global_commands()
 
     async def setup_hook(self) -> None:
         await self.store.load()
-        self.bg_tasks.append(self.loop.create_task(self.reminder_loop()))
-        self.bg_tasks.append(self.loop.create_task(self.habito_loop()))
-        self.bg_tasks.append(self.loop.create_task(self.rotina_anuncio_loop()))
-        self.bg_tasks.append(self.loop.create_task(self.rotina_dm_loop()))
-        self.bg_tasks.append(self.loop.create_task(self.rotina_summary_loop()))
-        self.bg_tasks.append(self.loop.create_task(self.pomodoro_loop()))
+        self.store.start_flusher()
+        self._index_habits()
+        self._index_rotinas()
+        self._index_timezones()
+        self._build_schedules()
+        self._pomodoro_view = PomodoroView(self)
+        self.add_view(self._pomodoro_view)
+        self.bg_tasks.append(self.loop.create_task(self.scheduler_loop()))
+        self.pomodoro_loop.start()
 
     async def close(self) -> None:
         for task in self.bg_tasks:
             task.cancel()
+        self.pomodoro_loop.cancel()
+        if self._spawned_tasks:
+            await asyncio.gather(*self._spawned_tasks, return_exceptions=True)
+        # Grava o estado já, sem esperar o debounce do flusher.
+        await self.store.flush()
+        await self.store.close()
         await super().close()
 
+    def _spawn(self, coro: Any) -> asyncio.Task[Any]:
+        task = self.loop.create_task(coro)
+        self._spawned_tasks.add(task)
+        task.add_done_callback(self._spawned_tasks.discard)
+        return task
+
     def _settings(self) -> Dict[str, Any]:
-        settings = self.store.data.setdefault("settings", {})
-        settings.setdefault("default_timezone", DEFAULT_TIMEZONE)
-        settings.setdefault("guild_timezones", {})
-        settings.setdefault("user_timezones", {})
-        return settings
+        # _merge_default garante as chaves padrão de settings na carga.
+        return self.store.data["settings"]
+
+    def _index_timezones(self) -> None:
+        # Espelho em int -> ZoneInfo: o caminho quente não converte chaves nem resolve nomes.
+        settings = self._settings()
+        self._default_tz = zoneinfo_for(settings["default_timezone"])
+        self._guild_tz = {int(key): zoneinfo_for(name) for key, name in settings["guild_timezones"].items() if name}
+        self._user_tz = {int(key): zoneinfo_for(name) for key, name in settings["user_timezones"].items() if name}
 
     def set_guild_timezone(self, guild_id: int, tz_name: str) -> None:
         settings = self._settings()
-        settings.setdefault("guild_timezones", {})[str(guild_id)] = tz_name
+        settings["guild_timezones"][str(guild_id)] = tz_name
+        self._summary_not_before = 0.0
+        self._guild_tz[guild_id] = zoneinfo_for(tz_name)
+        self._reschedule_announcements()
 
     def clear_guild_timezone(self, guild_id: int) -> None:
         settings = self._settings()
-        settings.setdefault("guild_timezones", {}).pop(str(guild_id), None)
+        settings["guild_timezones"].pop(str(guild_id), None)
+        self._summary_not_before = 0.0
+        self._guild_tz.pop(guild_id, None)
+        self._reschedule_announcements()
 
     def set_user_timezone(self, user_id: int, tz_name: str) -> None:
         settings = self._settings()
-        settings.setdefault("user_timezones", {})[str(user_id)] = tz_name
+        settings["user_timezones"][str(user_id)] = tz_name
+        self._user_tz[user_id] = zoneinfo_for(tz_name)
 
     def clear_user_timezone(self, user_id: int) -> None:
         settings = self._settings()
-        settings.setdefault("user_timezones", {}).pop(str(user_id), None)
+        settings["user_timezones"].pop(str(user_id), None)
+        self._user_tz.pop(user_id, None)
 
     def get_timezone_name(
         self, *, guild_id: Optional[int] = None, user_id: Optional[int] = None
     ) -> str:
         settings = self._settings()
         if user_id is not None:
-            tz_name = settings.get("user_timezones", {}).get(str(user_id))
+            tz_name = settings["user_timezones"].get(str(user_id))
             if tz_name:
                 return tz_name
         if guild_id is not None:
-            tz_name = settings.get("guild_timezones", {}).get(str(guild_id))
+            tz_name = settings["guild_timezones"].get(str(guild_id))
             if tz_name:
                 return tz_name
-        return settings.get("default_timezone", DEFAULT_TIMEZONE)
+        return settings["default_timezone"]
 
     def resolve_timezone(self, *, guild_id: Optional[int] = None, user_id: Optional[int] = None) -> ZoneInfo:
-        tz_name = self.get_timezone_name(guild_id=guild_id, user_id=user_id)
-        try:
-            return ZoneInfo(tz_name)
-        except ZoneInfoNotFoundError:
-            logging.warning("Fuso horário inválido armazenado: %s. Revertendo para UTC.", tz_name)
-            return ZoneInfo(DEFAULT_TIMEZONE)
+        if user_id is not None:
+            tz = self._user_tz.get(user_id)
+            if tz is not None:
+                return tz
+        if guild_id is not None:
+            tz = self._guild_tz.get(guild_id)
+            if tz is not None:
+                return tz
+        return self._default_tz
 
     def _dm_status_entry(self, user_id: int) -> Dict[str, Any]:
-        status_map = self.store.data.setdefault("dm_status", {})
+        status_map = self.store.data["dm_status"]
         entry = status_map.get(str(user_id))
-        if not isinstance(entry, dict):
-            entry = {"blocked": False, "next_check": 0, "notified": {}}
-        else:
-            entry.setdefault("blocked", False)
-            entry.setdefault("next_check", 0)
-            entry.setdefault("notified", {})
-        entry.setdefault("daily_limit", {})
-        status_map[str(user_id)] = entry
+        if entry is None:
+            entry = status_map[str(user_id)] = {**_DM_STATUS_DEFAULTS, "notified": {}, "daily_limit": {}}
         return entry
 
     def _dm_blocked_until(self, user_id: int) -> int:
-        entry = self._dm_status_entry(user_id)
-        if entry.get("blocked"):
-            return int(entry.get("next_check", 0))
+        entry = self.store.data["dm_status"].get(str(user_id))
+        if entry is not None and entry["blocked"]:
+            return int(entry["next_check"])
         return 0
 
     async def _mark_dm_success(self, user_id: int) -> None:
-        entry = self._dm_status_entry(user_id)
-        if entry.get("blocked"):
+        entry = self.store.data["dm_status"].get(str(user_id))
+        if entry is not None and entry["blocked"]:
             entry["blocked"] = False
             entry["next_check"] = 0
             entry["notified"] = {}
-            await self.store.save_data()
+            self.store.append_op("dm_status_set", user_id=user_id, status=entry)
 
     async def _handle_dm_blocked(
         self,
@@ -456,319 +1047,651 @@ class CerebrosoBot(commands.Bot):
                     limits[limits_key] = int(limits.get(limits_key, 0)) + 1
                 except Exception:
                     logging.exception("Falha ao avisar canal %s sobre DMs fechadas de %s", channel.id, user_id)
-        await self.store.save_data()
+        prune_dm_notices(notified, limits, now_ts)
+        self.store.append_op("dm_status_set", user_id=user_id, status=entry)
 
     async def rotina_skip_today(self, rotina_id: int, user_id: int, tz: ZoneInfo) -> None:
-        for rotina in self.store.data.get("global_habits", []):
-            if rotina.get("id") != rotina_id:
-                continue
-            enrollments = rotina.setdefault("enrollments", {})
-            prefs = enrollments.get(str(user_id))
-            if not isinstance(prefs, dict):
-                return
-            snooze_until = end_of_day_ts(tz)
-            prefs["snooze_until"] = snooze_until
-            prefs["next_ts"] = snooze_until
-            await self.store.save_data()
+        rotina = self._rotina_by_id.get(rotina_id)
+        if rotina is None:
             return
+        user_key = str(user_id)
+        prefs = rotina.get("enrollments", _EMPTY).get(user_key)
+        if not isinstance(prefs, dict):
+            return
+        snooze_until = end_of_day_ts(tz)
+        prefs["snooze_until"] = snooze_until
+        prefs["next_ts"] = snooze_until
+        self._schedule_enrollment(rotina, user_key)
+        self.store.append_op("enrollment_set", rotina_id=rotina_id, user_id=user_id, prefs=prefs)
 
     async def rotina_leave(self, rotina_id: int, user_id: int) -> None:
-        for rotina in self.store.data.get("global_habits", []):
-            if rotina.get("id") != rotina_id:
-                continue
-            enrollments = rotina.setdefault("enrollments", {})
-            if enrollments.pop(str(user_id), None):
-                await self.store.save_data()
+        rotina = self._rotina_by_id.get(rotina_id)
+        if rotina is None:
             return
-
-    def _register_guild_commands(self, guild: discord.abc.Snowflake) -> None:
-        for cmd in self._staff_commands:
-            self.tree.add_command(cmd, guild=guild)
-        for cmd in self._general_commands:
-            self.tree.add_command(cmd, guild=guild)
-        self.tree.add_command(self.pomodoro_group, guild=guild)
-        self.tree.add_command(self.lembrete_group, guild=guild)
-        self.tree.add_command(self.habito_group, guild=guild)
-        self.tree.add_command(self.rotina_group, guild=guild)
-        self.tree.add_command(self.rotina_admin_group, guild=guild)
-        self.tree.add_command(self.config_group, guild=guild)
+        if self._drop_enrollment(rotina, str(user_id)):
+            self.store.append_op("enrollment_removed", rotina_id=rotina_id, user_id=user_id)
+
+    def _add_global_commands(self) -> None:
+        # A árvore global local guarda o conjunto completo; cada guild recebe uma cópia dele.
+        for cmd in self._staff_commands + self._general_commands:
+            self.tree.add_command(cmd, override=True)
+        self.tree.add_command(self.pomodoro_group, override=True)
+        self.tree.add_command(self.lembrete_group, override=True)
+        self.tree.add_command(self.habito_group, override=True)
+        self.tree.add_command(self.rotina_group, override=True)
+        self.tree.add_command(self.rotina_admin_group, override=True)
+        self.tree.add_command(self.config_group, override=True)
+        self._debugslash_text = "Comandos registrados:\n" + "\n".join(
+            cmd.qualified_name for cmd in self.tree.walk_commands()
+        )
+        payload = sorted((cmd.to_dict(self.tree) for cmd in self.tree.get_commands()), key=lambda item: item["name"])
+        self._command_set_hash = hashlib.sha1(json_dumps(payload, sort_keys=True)).hexdigest()
 
     async def on_ready(self) -> None:
         logging.info("Conectado como %s", self.user)
         for guild in self.guilds:
             try:
-                self.tree.clear_commands(guild=guild)
-                self._register_guild_commands(guild)
-                await self.tree.sync(guild=guild)
+                await self._sync_guild_commands(guild)
             except Exception:
                 logging.exception("Falha ao sincronizar comandos em %s", guild.id)
 
+    async def _sync_guild_commands(self, guild: discord.Guild, force: bool = False) -> None:
+        # Só reenvia os comandos quando o conjunto mudou desde o último sync desta guild.
+        hashes = self.store.data["settings"].setdefault("command_sync_hashes", {})
+        key = str(guild.id)
+        self.tree.copy_global_to(guild=guild)
+        if not force and hashes.get(key) == self._command_set_hash:
+            return
+        await self.tree.sync(guild=guild)
+        hashes[key] = self._command_set_hash
+        self.store.mark_dirty()
+
+    def _channel_data(self, channel_id: Any) -> Dict[str, Any]:
+        channels = self.store.data["channels"]
+        key = str(channel_id)
+        channel_data = channels.get(key)
+        if channel_data is None:
+            channel_data = channels[key] = {"config": default_pomodoro_config(), "session": None}
+        return channel_data
+
     async def add_pomodoro_participant(self, channel_id: int, user_id: int) -> None:
-        channel_data = self.store.data.setdefault("channels", {}).setdefault(str(channel_id), {"config": default_pomodoro_config(), "session": None})
+        channel_data = self._channel_data(channel_id)
         session = channel_data.get("session") or {}
-        participants = set(session.get("participants", []))
+        participants = session_participants(session)
+        if user_id in participants:
+            return
         participants.add(user_id)
-        session["participants"] = list(participants)
         channel_data["session"] = session
-        await self.store.save_data()
+        self.store.append_op("pomodoro_join", channel_id=channel_id, user_id=user_id)
 
     async def remove_pomodoro_participant(self, channel_id: int, user_id: int) -> None:
-        channel_data = self.store.data.setdefault("channels", {}).setdefault(str(channel_id), {"config": default_pomodoro_config(), "session": None})
+        channel_data = self._channel_data(channel_id)
         session = channel_data.get("session") or {}
-        participants = set(session.get("participants", []))
+        participants = session_participants(session)
+        if user_id not in participants:
+            return
         participants.discard(user_id)
-        session["participants"] = list(participants)
         channel_data["session"] = session
-        await self.store.save_data()
+        self.store.append_op("pomodoro_leave", channel_id=channel_id, user_id=user_id)
 
     def _next_id(self, key: str) -> int:
-        current = self.store.data.setdefault("_next_ids", {}).get(key, 1)
-        self.store.data["_next_ids"][key] = current + 1
+        next_ids = self.store.data["_next_ids"]
+        current = next_ids.get(key, 1)
+        next_ids[key] = current + 1
         return current
 
-    async def reminder_loop(self) -> None:
+    def _index_habits(self) -> None:
+        for message_id, _ in self._habit_msg_index:
+            self._tracked_message_ids.discard(message_id)
+        self._habits_by_id.clear()
+        self._habit_msg_index.clear()
+        for habit in self.store.data.get("habits", []):
+            compact_habit_progress(habit)
+            self._habits_by_id[habit["id"]] = habit
+            self._index_habit_message(habit)
+
+    def _index_habit_message(self, habit: Dict[str, Any]) -> None:
+        message_id = habit.get("last_message_id")
+        if message_id:
+            self._habit_msg_index[(message_id, habit.get("emoji", "✅"))] = habit
+            self._tracked_message_ids.add(message_id)
+
+    def _unindex_habit_message(self, habit: Dict[str, Any]) -> None:
+        message_id = habit.get("last_message_id")
+        if message_id:
+            self._habit_msg_index.pop((message_id, habit.get("emoji", "✅")), None)
+            self._tracked_message_ids.discard(message_id)
+
+    def _unindex_habit(self, habit: Dict[str, Any]) -> None:
+        self._habits_by_id.pop(habit["id"], None)
+        self._unindex_habit_message(habit)
+
+    def _set_habit_message(self, habit: Dict[str, Any], message: discord.Message) -> None:
+        self._unindex_habit_message(habit)
+        habit["last_message_id"] = message.id
+        habit["last_channel_id"] = message.channel.id
+        self._index_habit_message(habit)
+
+    def _user_habit(self, user_id: int, habit_id: int) -> Optional[Dict[str, Any]]:
+        habit = self._habits_by_id.get(habit_id)
+        if habit is None or habit.get("user_id") != user_id:
+            return None
+        return habit
+
+    def _index_rotinas(self) -> None:
+        for message_id in self._rotina_by_message:
+            self._tracked_message_ids.discard(message_id)
+        self._rotina_by_id.clear()
+        self._rotina_by_name.clear()
+        self._rotina_names.clear()
+        self._rotina_by_message.clear()
+        self._enrollments_by_user.clear()
+        for rotina in self.store.data.get("global_habits", []):
+            normalize_streak_roles(rotina)
+            self._index_rotina(rotina)
+
+    def _index_rotina(self, rotina: Dict[str, Any]) -> None:
+        self._rotina_by_id[rotina["id"]] = rotina
+        name = rotina.get("name", "").lower()
+        self._rotina_by_name.setdefault(name, rotina)
+        # Lista ordenada de (nome, id) para buscar por prefixo com bisect.
+        entry = (name, rotina["id"])
+        pos = bisect.bisect_left(self._rotina_names, entry)
+        if pos == len(self._rotina_names) or self._rotina_names[pos] != entry:
+            self._rotina_names.insert(pos, entry)
+        for user_id_str in rotina.get("enrollments", _EMPTY):
+            self._enrollments_by_user[user_id_str].add(rotina["id"])
+        # Só os anúncios recentes ainda podem receber reações que contam para "hoje".
+        since = (datetime.now(timezone.utc).date() - timedelta(days=1)).isoformat()
+        for day, daily in rotina.get("announcements", _EMPTY).items():
+            if not isinstance(daily, dict) or not isinstance(day, str) or day < since:
+                continue
+            entries = [daily] if "message_id" in daily else daily.values()
+            for entry in entries:
+                if isinstance(entry, dict) and entry.get("message_id"):
+                    self._track_rotina_announcement(rotina, day, entry["message_id"])
+
+    def _track_rotina_announcement(self, rotina: Dict[str, Any], day: str, message_id: int) -> None:
+        if day > self._rotina_index_day:
+            self._rotina_index_day = day
+            self._prune_rotina_announcements(day)
+        self._rotina_by_message[message_id] = (rotina, day)
+        self._tracked_message_ids.add(message_id)
+
+    def _prune_rotina_announcements(self, day: str) -> None:
+        # Reações só contam para "hoje"; ontem fica para servidores em fusos atrasados.
+        try:
+            since = (date.fromisoformat(day) - timedelta(days=1)).isoformat()
+        except ValueError:
+            return
+        for message_id in [mid for mid, (_, seen) in self._rotina_by_message.items() if seen < since]:
+            del self._rotina_by_message[message_id]
+            self._tracked_message_ids.discard(message_id)
+
+    def _unindex_rotina(self, rotina: Dict[str, Any]) -> None:
+        self._rotina_by_id.pop(rotina["id"], None)
+        for user_id_str in rotina.get("enrollments", _EMPTY):
+            self._enrollments_by_user[user_id_str].discard(rotina["id"])
+        for message_id in [mid for mid, (owner, _) in self._rotina_by_message.items() if owner is rotina]:
+            del self._rotina_by_message[message_id]
+            self._tracked_message_ids.discard(message_id)
+        name = rotina.get("name", "").lower()
+        pos = bisect.bisect_left(self._rotina_names, (name, rotina["id"]))
+        if pos < len(self._rotina_names) and self._rotina_names[pos] == (name, rotina["id"]):
+            del self._rotina_names[pos]
+        if self._rotina_by_name.get(name) is rotina:
+            del self._rotina_by_name[name]
+            # Nomes repetidos: a próxima rotina com o mesmo nome passa a responder por ele.
+            for other in self.store.data.get("global_habits", []):
+                if other is not rotina and other.get("name", "").lower() == name:
+                    self._rotina_by_name[name] = other
+                    break
+
+    def _build_schedules(self) -> None:
+        self._reminder_schedule.clear()
+        self._habit_schedule.clear()
+        self._rotina_dm_schedule.clear()
+        self._announcement_schedule.clear()
+        self._pomodoro_schedule.clear()
+        data = self.store.data
+        for channel_id, channel_data in data.get("channels", {}).items():
+            if channel_data.get("session"):
+                self._schedule_pomodoro(channel_id, channel_data["session"])
+        for reminder in data.get("reminders", []):
+            if not reminder.get("delivered"):
+                self._reminder_schedule.schedule(reminder["id"], int(reminder.get("when_ts", 0)), reminder)
+        for habit in data.get("habits", []):
+            self._schedule_habit(habit)
+        for rotina in data.get("global_habits", []):
+            self._schedule_rotina_enrollments(rotina)
+            self._schedule_announcement(rotina)
+
+    def _schedule_habit(self, habit: Dict[str, Any], not_before: int = 0) -> None:
+        if not habit.get("active", True):
+            self._habit_schedule.discard(habit["id"])
+            return
+        due = max(not_before, int(habit.get("next_ts", 0) or 0))
+        self._habit_schedule.schedule(habit["id"], due, habit)
+        self._scheduler_wake.set()
+
+    def _schedule_enrollment(
+        self, rotina: Dict[str, Any], user_id_str: str, not_before: int = 0
+    ) -> None:
+        prefs = rotina.get("enrollments", _EMPTY).get(user_id_str)
+        key = (rotina["id"], user_id_str)
+        if not isinstance(prefs, dict) or not prefs.get("dm", True):
+            self._rotina_dm_schedule.discard(key)
+            return
+        due = max(not_before, int(prefs.get("next_ts", 0) or 0))
+        self._rotina_dm_schedule.schedule(key, due, (rotina, user_id_str))
+        self._scheduler_wake.set()
+
+    def _schedule_announcement(self, rotina: Dict[str, Any]) -> None:
+        # O próximo horário depende do canal e do fuso; o primeiro tick o calcula.
+        if rotina.get("active", True):
+            self._announcement_schedule.schedule(rotina["id"], 0, (rotina, 0))
+            self._scheduler_wake.set()
+        else:
+            self._announcement_schedule.discard(rotina["id"])
+
+    def _reschedule_announcements(self) -> None:
+        for rotina in self.store.data.get("global_habits", []):
+            self._schedule_announcement(rotina)
+
+    def _next_announcement_ts(self, rotina: Dict[str, Any], tz: ZoneInfo, after_ts: float) -> Optional[int]:
+        local_day = datetime.fromtimestamp(after_ts, tz).date()
+        best: Optional[int] = None
+        for minute_of_day in self._rotina_times(rotina):
+            hour, minute = divmod(minute_of_day, 60)
+            for offset in (0, 1):
+                day = local_day + timedelta(days=offset)
+                due = int(datetime(day.year, day.month, day.day, hour, minute, tzinfo=tz).timestamp())
+                if due > after_ts:
+                    if best is None or due < best:
+                        best = due
+                    break
+        return best
+
+    def _schedule_rotina_enrollments(self, rotina: Dict[str, Any]) -> None:
+        for user_id_str in rotina.get("enrollments", {}):
+            self._schedule_enrollment(rotina, user_id_str)
+
+    def _unschedule_rotina(self, rotina: Dict[str, Any]) -> None:
+        for user_id_str in rotina.get("enrollments", {}):
+            self._rotina_dm_schedule.discard((rotina["id"], user_id_str))
+        self._announcement_schedule.discard(rotina["id"])
+        self._rotina_times_cache.pop(rotina["id"], None)
+        self._rotina_month_counts.pop(rotina["id"], None)
+        self._rotina_streaks.pop(rotina["id"], None)
+        self._rotina_stats_cache.pop(rotina["id"], None)
+
+    def _rotina_times(self, rotina: Dict[str, Any]) -> Dict[int, List[str]]:
+        # Editar horários troca a lista inteira, então a identidade dela invalida o cache.
+        times = rotina.get("times")
+        cached = self._rotina_times_cache.get(rotina["id"])
+        if cached is not None and cached[0] is times:
+            return cached[1]
+        # Chave em minutos do dia; as strings originais ficam para persistência e exibição.
+        parsed: Dict[int, List[str]] = {}
+        for entry in ["20:00"] if times is None else times:
+            hhmm = parse_hhmm(entry)
+            if hhmm:
+                parsed.setdefault(hhmm[0] * 60 + hhmm[1], []).append(entry)
+        self._rotina_times_cache[rotina["id"]] = (times, parsed)
+        return parsed
+
+    def _schedule_pomodoro(self, channel_id: str, session: Optional[Dict[str, Any]], not_before: int = 0) -> None:
+        if not session or not session.get("active") or session.get("paused"):
+            self._pomodoro_schedule.discard(channel_id)
+        else:
+            due = int(session.get("last_ts", 0)) + int(session.get("remaining", 0))
+            self._pomodoro_schedule.schedule(channel_id, max(not_before, due), channel_id)
+        self._pomodoro_wake.set()
+
+    def _schedule_delay(self, schedule: DueHeap) -> float:
+        next_ts = schedule.next_ts()
+        if next_ts is None:
+            return SCHEDULER_MAX_SLEEP_SECONDS
+        return min(SCHEDULER_MAX_SLEEP_SECONDS, max(1.0, next_ts - time.time()))
+
+    def _channel_context(
+        self,
+        channel_id: Optional[int],
+        now_utc: datetime,
+        contexts: Dict[Optional[int], Optional[Tuple[discord.TextChannel, ZoneInfo, datetime, str]]],
+    ) -> Optional[Tuple[discord.TextChannel, ZoneInfo, datetime, str]]:
+        # Várias rotinas dividem o mesmo canal; o fuso e a hora local saem uma vez por varredura.
+        if channel_id in contexts:
+            return contexts[channel_id]
+        context = None
+        channel = self.get_channel(channel_id) if channel_id else None
+        if isinstance(channel, discord.TextChannel):
+            tz = self.resolve_timezone(guild_id=channel.guild.id)
+            now_local = now_utc.astimezone(tz)
+            context = (channel, tz, now_local, now_local.date().isoformat())
+        contexts[channel_id] = context
+        return context
+
+    def _summary_delay(self, now_utc: datetime) -> float:
+        now_ts = now_utc.timestamp()
+        delay = float(SCHEDULER_MAX_SLEEP_SECONDS)
+        for guild in self.guilds:
+            now_local = now_utc.astimezone(self.resolve_timezone(guild_id=guild.id))
+            if (now_local.hour, now_local.minute) >= ROTINA_SUMMARY_START:
+                # Confirmações tardias ainda entram no resumo até a meia-noite.
+                delay = min(delay, 60.0)
+                continue
+            day = now_local.date()
+            hour, minute = ROTINA_SUMMARY_START
+            due = datetime(day.year, day.month, day.day, hour, minute, tzinfo=now_local.tzinfo).timestamp()
+            delay = min(delay, due - now_ts)
+        delay = max(1.0, delay)
+        # Até lá nenhum servidor entra na janela de resumo; os outros despertares pulam a varredura.
+        self._summary_not_before = now_ts + delay - 1
+        return delay
+
+    async def scheduler_loop(self) -> None:
         await self.wait_until_ready()
+        ticks = (
+            # Anúncios primeiro: os fan-outs de DM podem demorar e não devem atrasar o horário.
+            ("Erro no loop de anúncios de rotina", self._tick_rotina_announcements),
+            ("Erro no loop de lembretes", self._tick_reminders),
+            ("Erro no loop de hábitos", self._tick_habits),
+            ("Erro no loop de DMs de rotina", self._tick_rotina_dms),
+            ("Erro no loop de resumos de rotina", self._tick_rotina_summaries),
+        )
         while not self.is_closed():
+            now_utc = utcnow()
+            now_ts = to_timestamp(now_utc)
+            changed = False
+            for error_message, tick in ticks:
+                try:
+                    changed = await tick(now_utc, now_ts) or changed
+                except asyncio.CancelledError:
+                    raise
+                except Exception:
+                    logging.exception(error_message)
+            if changed:
+                self.store.mark_dirty()
+            self._scheduler_wake.clear()
+            timeout = min(
+                self._schedule_delay(self._reminder_schedule),
+                self._schedule_delay(self._habit_schedule),
+                self._schedule_delay(self._rotina_dm_schedule),
+                self._schedule_delay(self._announcement_schedule),
+                self._summary_delay(utcnow()),
+            )
             try:
-                now_ts = int(time.time())
-                changed = False
-                for reminder in self.store.data.get("reminders", []):
-                    if not reminder.get("delivered") and reminder.get("when_ts", 0) <= now_ts:
-                        user = self.get_user(reminder["user_id"])
-                        if user is None:
-                            try:
-                                user = await self.fetch_user(reminder["user_id"])
-                            except Exception:
-                                user = None
-                        if user:
-                            try:
-                                await user.send(f"⏰ **Lembrete:** {reminder['text']}")
-                                reminder["delivered"] = True
-                                changed = True
-                            except Exception:
-                                logging.exception("Falha ao enviar DM de lembrete para %s", reminder["user_id"])
-                if changed:
-                    await self.store.save_data()
-            except asyncio.CancelledError:
-                raise
-            except Exception:
-                logging.exception("Erro no loop de lembretes")
-            await asyncio.sleep(30)
+                await asyncio.wait_for(self._scheduler_wake.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _tick_reminders(self, now_utc: datetime, now_ts: int) -> bool:
+        due = [reminder for reminder in self._reminder_schedule.pop_due(now_ts) if not reminder.get("delivered")]
+        results = await asyncio.gather(*(self._deliver_reminder(reminder) for reminder in due), return_exceptions=True)
+        for reminder, result in zip(due, results):
+            if result is True:
+                reminder["delivered"] = True
+                self.store.append_op("reminder_delivered", id=reminder["id"])
+                continue
+            if isinstance(result, BaseException):
+                logging.error("Falha ao enviar DM de lembrete para %s", reminder["user_id"], exc_info=result)
+            self._reminder_schedule.schedule(reminder["id"], now_ts + SCHEDULER_RETRY_SECONDS, reminder)
+        return False
 
-    async def habito_loop(self) -> None:
-        await self.wait_until_ready()
-        while not self.is_closed():
+    async def _deliver_reminder(self, reminder: Dict[str, Any]) -> bool:
+        user = self.get_user(reminder["user_id"]) or await self.fetch_user_safe(reminder["user_id"])
+        if not user:
+            return False
+        async with self._dm_semaphore:
+            await user.send(f"⏰ **Lembrete:** {reminder['text']}")
+        return True
+
+    async def _tick_habits(self, now_utc: datetime, now_ts: int) -> bool:
+        # Usuários diferentes em paralelo; os hábitos de um mesmo usuário em sequência, para que
+        # um Forbidden marque o bloqueio antes da próxima DM (e do próximo aviso no canal).
+        due_by_user: Dict[Any, List[Dict[str, Any]]] = defaultdict(list)
+        for habit in self._habit_schedule.pop_due(now_ts):
+            due_by_user[habit.get("user_id")].append(habit)
+        results = await asyncio.gather(
+            *(self._remind_user_habits(habits, now_utc, now_ts) for habits in due_by_user.values()),
+            return_exceptions=True,
+        )
+        changed = False
+        for user_id, result in zip(due_by_user, results):
+            if isinstance(result, BaseException):
+                logging.error("Falha ao processar hábitos de %s", user_id, exc_info=result)
+            elif result:
+                changed = True
+        return changed
+
+    async def _remind_user_habits(self, habits: List[Dict[str, Any]], now_utc: datetime, now_ts: int) -> bool:
+        changed = False
+        for habit in habits:
             try:
-                now_ts = int(time.time())
-                changed = False
-                for habit in self.store.data.get("habits", []):
-                    if not habit.get("active", True):
-                        continue
-                    channel_id = habit.get("channel_id")
-                    channel = self.get_channel(channel_id) if channel_id else None
-                    guild_id = habit.get("guild_id")
-                    if guild_id is None and isinstance(channel, discord.TextChannel):
-                        guild_id = channel.guild.id
-                    tz = self.resolve_timezone(guild_id=guild_id, user_id=habit.get("user_id"))
-                    goal = max(1, int(habit.get("goal_per_day", 1)))
-                    progress = habit.setdefault("progress", {})
-                    today = today_key(tz=tz)
-                    done_today = progress.get(today, 0)
-                    next_ts = habit.get("next_ts", 0)
-                    interval_min = max(5, int(habit.get("interval_min", habit.get("interval_min", 60))))
-                    if done_today >= goal:
-                        continue
-                    if next_ts and next_ts > now_ts:
-                        continue
-                    user_id = habit.get("user_id")
-                    if guild_id:
-                        guild = self.get_guild(int(guild_id))
-                        if guild:
-                            member = await self._ensure_member(guild, user_id)
-                            if member is None:
-                                habit["next_ts"] = now_ts + 86400
-                                changed = True
-                                continue
-                    user = self.get_user(user_id) or await self.fetch_user_safe(user_id)
-                    if not user:
-                        continue
-                    blocked_until = self._dm_blocked_until(user.id)
-                    if blocked_until and blocked_until > now_ts:
-                        if habit.get("next_ts", 0) < blocked_until:
-                            habit["next_ts"] = blocked_until
-                            changed = True
-                        continue
-                    try:
-                        emoji = habit.get("emoji", "✅")
-                        message = await user.send(
-                            f"{emoji} Olá! Hora do hábito **{habit['name']}**. Reaja com {emoji} nesta mensagem para marcar 1x concluído."
-                        )
-                        try:
-                            await message.add_reaction(emoji)
-                        except Exception:
-                            pass
-                        habit["last_message_id"] = message.id
-                        habit["last_channel_id"] = message.channel.id
-                        habit["next_ts"] = now_ts + interval_min * 60
-                        changed = True
-                        await self._mark_dm_success(user.id)
-                    except discord.Forbidden:
-                        await self._handle_dm_blocked(user.id, channel)
-                        habit["next_ts"] = now_ts + 300
-                        changed = True
-                    except Exception:
-                        logging.exception("Falha ao enviar lembrete de hábito para %s", habit["user_id"])
-                if changed:
-                    await self.store.save_data()
-            except asyncio.CancelledError:
-                raise
+                changed = await self._remind_habit(habit, now_utc, now_ts) or changed
             except Exception:
-                logging.exception("Erro no loop de hábitos")
-            await asyncio.sleep(30)
+                logging.exception("Falha ao processar hábito %s", habit.get("id"))
+        return changed
 
-    async def rotina_anuncio_loop(self) -> None:
-        await self.wait_until_ready()
-        while not self.is_closed():
+    async def _remind_habit(self, habit: Dict[str, Any], now_utc: datetime, now_ts: int) -> bool:
+        changed = False
+        wake_ts = now_ts + SCHEDULER_RETRY_SECONDS
+        try:
+            if not habit.get("active", True):
+                return changed
+            channel_id = habit.get("channel_id")
+            channel = self.get_channel(channel_id) if channel_id else None
+            guild_id = habit.get("guild_id")
+            if guild_id is None and isinstance(channel, discord.TextChannel):
+                guild_id = channel.guild.id
+            tz = self.resolve_timezone(guild_id=guild_id, user_id=habit.get("user_id"))
+            goal = max(1, int(habit.get("goal_per_day", 1)))
+            today = now_utc.astimezone(tz).date().isoformat()
+            done_today = habit_today_count(habit, today)
+            next_ts = habit.get("next_ts", 0)
+            interval_min = max(5, int(habit.get("interval_min", habit.get("interval_min", 60))))
+            if done_today >= goal:
+                wake_ts = max(wake_ts, end_of_day_ts(tz))
+                return changed
+            if next_ts and next_ts > now_ts:
+                return changed
+            user_id = habit.get("user_id")
+            # DM bloqueada decide antes de qualquer busca de membro ou usuário na API.
+            blocked_until = self._dm_blocked_until(user_id)
+            if blocked_until and blocked_until > now_ts:
+                if habit.get("next_ts", 0) < blocked_until:
+                    habit["next_ts"] = blocked_until
+                    changed = True
+                return changed
+            if guild_id:
+                guild = self.get_guild(int(guild_id))
+                if guild:
+                    member = await self._ensure_member(guild, user_id)
+                    if member is None:
+                        habit["next_ts"] = now_ts + 86400
+                        return True
+            user = self.get_user(user_id) or await self.fetch_user_safe(user_id)
+            if not user:
+                return changed
             try:
-                now_utc = utcnow()
-                for rotina in self.store.data.get("global_habits", []):
-                    if not rotina.get("active", True):
-                        continue
-                    channel = self.get_channel(rotina.get("channel_id"))
-                    if not isinstance(channel, discord.TextChannel):
-                        continue
-                    tz = self.resolve_timezone(guild_id=channel.guild.id)
-                    today = today_key(tz=tz)
-                    now_local = now_utc.astimezone(tz)
-                    times = rotina.get("times", ["20:00"])
-                    for entry in times:
-                        hhmm = parse_hhmm(entry)
-                        if not hhmm:
-                            continue
-                        hour, minute = hhmm
-                        if now_local.hour == hour and now_local.minute == minute:
-                            ann = rotina.setdefault("announcements", {})
-                            daily = ann.get(today)
-                            if isinstance(daily, dict) and "message_id" in daily:
-                                daily = {"__legacy__": daily}
-                                ann[today] = daily
-                            if not isinstance(daily, dict):
-                                daily = {}
-                                ann[today] = daily
-                            if entry in daily:
-                                continue
-                            emoji = rotina.get("emoji", "✅")
-                            view = RotinaButton(self, rotina["id"], today, emoji)
-                            content = f"{emoji} Rotina **{rotina['name']}**!"
-                            role_id = rotina.get("role_id")
-                            allowed = discord.AllowedMentions(roles=True, everyone=False, users=False)
-                            if role_id:
-                                content = f"<@&{role_id}> {content}"
-                            try:
-                                message = await channel.send(content, view=view, allowed_mentions=allowed)
-                                try:
-                                    await message.add_reaction(emoji)
-                                except Exception:
-                                    pass
-                                daily[entry] = {
-                                    "message_id": message.id,
-                                    "ts": to_timestamp(now_utc),
-                                    "time": entry,
-                                }
-                                enrollments = rotina.get("enrollments", {})
-                                now_ts = int(time.time())
-                                confirmations_map = rotina.setdefault("confirmations", {}).setdefault(today, {})
-                                for user_id_str, prefs in enrollments.items():
-                                    if not prefs.get("dm", True):
-                                        continue
-                                    if confirmations_map.get(user_id_str):
-                                        continue
-                                    snooze_until = int(prefs.get("snooze_until", 0) or 0)
-                                    if snooze_until and snooze_until > now_ts:
-                                        continue
-                                    prefs["next_ts"] = now_ts
-                                await self.store.save_data()
-                            except Exception:
-                                logging.exception("Erro ao anunciar rotina %s", rotina["name"])
-            except asyncio.CancelledError:
-                raise
+                emoji = habit.get("emoji", "✅")
+                async with self._dm_semaphore:
+                    message = await user.send(
+                        f"{emoji} Olá! Hora do hábito **{habit['name']}**. Reaja com {emoji} nesta mensagem para marcar 1x concluído."
+                    )
+                    try:
+                        await message.add_reaction(emoji)
+                    except Exception:
+                        pass
+                # /habito deletar pode ter removido o hábito enquanto a DM saía.
+                if self._habits_by_id.get(habit["id"]) is habit:
+                    self._set_habit_message(habit, message)
+                habit["next_ts"] = now_ts + interval_min * 60
+                changed = True
+                await self._mark_dm_success(user.id)
+            except discord.Forbidden:
+                await self._handle_dm_blocked(user.id, channel)
+                habit["next_ts"] = now_ts + 300
+                changed = True
             except Exception:
-                logging.exception("Erro no loop de anúncios de rotina")
-            await asyncio.sleep(30)
+                logging.exception("Falha ao enviar lembrete de hábito para %s", habit["user_id"])
+        finally:
+            if self._habits_by_id.get(habit["id"]) is habit:
+                self._schedule_habit(habit, not_before=wake_ts)
+        return changed
 
-    async def rotina_dm_loop(self) -> None:
-        await self.wait_until_ready()
-        while not self.is_closed():
-            try:
-                now_ts = int(time.time())
-                for rotina in self.store.data.get("global_habits", []):
-                    if not rotina.get("active", True):
-                        continue
-                    channel = self.get_channel(rotina.get("channel_id"))
-                    if not isinstance(channel, discord.TextChannel):
-                        continue
-                    guild_id = channel.guild.id
-                    tz = self.resolve_timezone(guild_id=guild_id)
-                    today = today_key(tz=tz)
-                    confirmations = rotina.setdefault("confirmations", {}).setdefault(today, {})
+    async def _tick_rotina_announcements(self, now_utc: datetime, now_ts: int) -> bool:
+        changed = False
+        contexts: Dict[Optional[int], Any] = {}
+        for rotina, trigger_ts in self._announcement_schedule.pop_due(now_ts):
+            if not rotina.get("active", True) or self._rotina_by_id.get(rotina["id"]) is not rotina:
+                continue
+            context = self._channel_context(rotina.get("channel_id"), now_utc, contexts)
+            if context is None:
+                self._announcement_schedule.schedule(rotina["id"], now_ts + SCHEDULER_RETRY_SECONDS, (rotina, 0))
+                continue
+            channel, tz, _, today = context
+            trigger_local = datetime.fromtimestamp(trigger_ts, tz) if trigger_ts else None
+            # Um disparo atrasado (varredura lenta) ainda vale enquanto for do mesmo dia local;
+            # o próximo parte dele, para não pular horários que venceram no meio tempo.
+            on_time = trigger_local is not None and trigger_local.date().isoformat() == today
+            next_ts = self._next_announcement_ts(rotina, tz, trigger_ts + 59 if on_time else now_ts)
+            if next_ts is not None:
+                self._announcement_schedule.schedule(rotina["id"], next_ts, (rotina, next_ts))
+            # Entradas recalculadas (0) e disparos de outro dia apenas reagendam.
+            if not on_time:
+                continue
+            due_times = self._rotina_times(rotina).get(trigger_local.hour * 60 + trigger_local.minute, ())
+            for entry in due_times:
+                ann = rotina.setdefault("announcements", {})
+                daily = ann.get(today)
+                if isinstance(daily, dict) and "message_id" in daily:
+                    daily = {"__legacy__": daily}
+                    ann[today] = daily
+                if not isinstance(daily, dict):
+                    daily = {}
+                    ann[today] = daily
+                if entry in daily:
+                    continue
+                emoji = rotina.get("emoji", "✅")
+                view = RotinaButton(self, rotina["id"], today, emoji)
+                content = f"{emoji} Rotina **{rotina['name']}**!"
+                role_id = rotina.get("role_id")
+                allowed = discord.AllowedMentions(roles=True, everyone=False, users=False)
+                if role_id:
+                    content = f"<@&{role_id}> {content}"
+                try:
+                    message = await channel.send(content, view=view, allowed_mentions=allowed)
+                    try:
+                        await message.add_reaction(emoji)
+                    except Exception:
+                        pass
+                    daily[entry] = {
+                        "message_id": message.id,
+                        "ts": to_timestamp(now_utc),
+                        "time": entry,
+                    }
+                    self._track_rotina_announcement(rotina, today, message.id)
                     enrollments = rotina.get("enrollments", {})
-                    emoji = rotina.get("emoji", "✅")
-                    announcements = rotina.setdefault("announcements", {})
-                    daily = announcements.get(today)
-                    ann_info: Optional[Dict[str, Any]] = None
-                    if isinstance(daily, dict):
-                        if "message_id" in daily:
-                            ann_info = daily
-                        else:
-                            valid_entries = [
-                                value
-                                for value in daily.values()
-                                if isinstance(value, dict) and value.get("message_id")
-                            ]
-                            if valid_entries:
-                                ann_info = max(valid_entries, key=lambda v: int(v.get("ts", 0)))
-                    if not isinstance(ann_info, dict):
-                        continue
-                    message_id = ann_info.get("message_id")
-                    if not message_id:
-                        continue
-                    jump_url = f"https://discord.com/channels/{channel.guild.id}/{channel.id}/{message_id}"
-                    save_needed = False
+                    confirmations_map = rotina.get("confirmations", _EMPTY).get(today, _EMPTY)
                     for user_id_str, prefs in enrollments.items():
-                        user_id = int(user_id_str)
                         if not prefs.get("dm", True):
                             continue
-                        if confirmations.get(str(user_id)):
+                        if confirmations_map.get(user_id_str):
                             continue
                         snooze_until = int(prefs.get("snooze_until", 0) or 0)
-                        if snooze_until:
-                            if snooze_until > now_ts:
-                                continue
-                            prefs.pop("snooze_until", None)
-                            save_needed = True
-                        member = await self._ensure_member(channel.guild, user_id)
-                        if member is None:
-                            prefs["next_ts"] = now_ts + 86400
-                            save_needed = True
-                            continue
-                        interval_min = max(5, int(prefs.get("interval_min", 90)))
-                        next_ts = prefs.get("next_ts", 0)
-                        if next_ts and next_ts > now_ts:
-                            continue
-                        blocked_until = self._dm_blocked_until(user_id)
-                        if blocked_until and blocked_until > now_ts:
-                            if prefs.get("next_ts", 0) < blocked_until:
-                                prefs["next_ts"] = blocked_until
-                                save_needed = True
+                        if snooze_until and snooze_until > now_ts:
                             continue
-                        quiet = prefs.get("quiet", {"start": "06:00", "end": "23:00"})
-                        if not self._is_within_window(now_ts, quiet.get("start"), quiet.get("end"), tz):
-                            continue
-                        user = self.get_user(user_id) or await self.fetch_user_safe(user_id)
-                        if not user:
-                            continue
-                        try:
-                            extra = f"\n👉 Confirme aqui: {jump_url}"
+                        prefs["next_ts"] = now_ts
+                        self._schedule_enrollment(rotina, user_id_str)
+                    changed = True
+                except Exception:
+                    logging.exception("Erro ao anunciar rotina %s", rotina["name"])
+        return changed
+
+    async def _tick_rotina_dms(self, now_utc: datetime, now_ts: int) -> bool:
+        due_by_rotina: Dict[int, Tuple[Dict[str, Any], List[str]]] = {}
+        for rotina, user_id_str in self._rotina_dm_schedule.pop_due(now_ts):
+            due_by_rotina.setdefault(rotina["id"], (rotina, []))[1].append(user_id_str)
+        save_needed = False
+        contexts: Dict[Optional[int], Any] = {}
+        for rotina, user_ids in due_by_rotina.values():
+            dropped: Set[str] = set()
+            try:
+                if not rotina.get("active", True) or self._rotina_by_id.get(rotina["id"]) is not rotina:
+                    dropped.update(user_ids)
+                    continue
+                context = self._channel_context(rotina.get("channel_id"), now_utc, contexts)
+                if context is None:
+                    continue
+                channel, tz, now_local, today = context
+                minutes_now = now_local.hour * 60 + now_local.minute
+                enrollments = rotina.get("enrollments", {})
+                emoji = rotina.get("emoji", "✅")
+                announcements = rotina.setdefault("announcements", {})
+                daily = announcements.get(today)
+                ann_info: Optional[Dict[str, Any]] = None
+                if isinstance(daily, dict):
+                    if "message_id" in daily:
+                        ann_info = daily
+                    else:
+                        # Anúncio mais recente do dia numa passada só; "ts" é sempre gravado como int.
+                        best_ts = -1
+                        for value in daily.values():
+                            if isinstance(value, dict) and value.get("message_id"):
+                                ts = value.get("ts") or 0
+                                if ts > best_ts:
+                                    best_ts = ts
+                                    ann_info = value
+                message_id = ann_info.get("message_id") if isinstance(ann_info, dict) else None
+                if not message_id:
+                    dropped.update(user_ids)
+                    continue
+                jump_url = f"https://discord.com/channels/{channel.guild.id}/{channel.id}/{message_id}"
+
+                async def remind(user_id_str: str) -> bool:
+                    changed = False
+                    prefs = enrollments.get(user_id_str)
+                    if not isinstance(prefs, dict) or not prefs.get("dm", True):
+                        return changed
+                    if rotina.get("confirmations", _EMPTY).get(today, _EMPTY).get(user_id_str):
+                        dropped.add(user_id_str)
+                        return changed
+                    user_id = int(user_id_str)
+                    snooze_until = int(prefs.get("snooze_until", 0) or 0)
+                    if snooze_until:
+                        if snooze_until > now_ts:
+                            return changed
+                        prefs.pop("snooze_until", None)
+                        changed = True
+                    next_ts = prefs.get("next_ts", 0)
+                    if next_ts and next_ts > now_ts:
+                        return changed
+                    blocked_until = self._dm_blocked_until(user_id)
+                    if blocked_until and blocked_until > now_ts:
+                        if (next_ts or 0) < blocked_until:
+                            prefs["next_ts"] = blocked_until
+                            changed = True
+                        return changed
+                    member = await self._ensure_member(channel.guild, user_id)
+                    if member is None:
+                        prefs["next_ts"] = now_ts + 86400
+                        return True
+                    interval_min = max(5, int(prefs.get("interval_min", 90)))
+                    quiet = prefs.get("quiet", _DEFAULT_QUIET)
+                    if not self._is_within_window(minutes_now, quiet.get("start"), quiet.get("end")):
+                        return changed
+                    user = self.get_user(user_id) or await self.fetch_user_safe(user_id)
+                    if not user:
+                        return changed
+                    try:
+                        extra = f"\n👉 Confirme aqui: {jump_url}"
+                        async with self._dm_semaphore:
+                            # Relido na hora: o "Fiz!" pode ter chegado durante as buscas e a fila do semáforo.
+                            if rotina.get("confirmations", _EMPTY).get(today, _EMPTY).get(user_id_str):
+                                dropped.add(user_id_str)
+                                return changed
                             await user.send(
                                 (
                                     f"{emoji} Olá! Já fez a rotina **{rotina['name']}** hoje? "
@@ -776,98 +1699,173 @@ class CerebrosoBot(commands.Bot):
                                 ),
                                 view=RotinaDMView(self, rotina["id"], user_id, tz),
                             )
-                            prefs["next_ts"] = now_ts + interval_min * 60
-                            save_needed = True
-                            await self._mark_dm_success(user_id)
-                        except discord.Forbidden:
-                            await self._handle_dm_blocked(user_id, channel)
-                            prefs["next_ts"] = now_ts + 300
-                            save_needed = True
-                        except Exception:
-                            logging.exception("Falha ao enviar DM da rotina para %s", user_id)
-                    if save_needed:
-                        await self.store.save_data()
-            except asyncio.CancelledError:
-                raise
-            except Exception:
-                logging.exception("Erro no loop de DMs de rotina")
-            await asyncio.sleep(30)
+                        prefs["next_ts"] = now_ts + interval_min * 60
+                        await self._mark_dm_success(user_id)
+                    except discord.Forbidden:
+                        await self._handle_dm_blocked(user_id, channel)
+                        prefs["next_ts"] = now_ts + 300
+                    except Exception:
+                        logging.exception("Falha ao enviar DM da rotina para %s", user_id)
+                        return changed
+                    return True
 
-    async def rotina_summary_loop(self) -> None:
-        await self.wait_until_ready()
-        while not self.is_closed():
-            try:
-                now_utc = datetime.now(timezone.utc)
-                summaries = self.store.data.setdefault("rotina_summaries", {})
-                for guild in list(self.guilds):
-                    tz = self.resolve_timezone(guild_id=guild.id)
-                    now_local = now_utc.astimezone(tz)
-                    today = now_local.date().isoformat()
-                    if not (now_local.hour == 23 and now_local.minute >= 50):
-                        continue
-                    guild_state = summaries.setdefault(str(guild.id), {})
-                    user_confirmations: Dict[int, List[str]] = defaultdict(list)
-                    for rotina in self.store.data.get("global_habits", []):
-                        channel = self.get_channel(rotina.get("channel_id"))
-                        if not isinstance(channel, discord.TextChannel):
-                            continue
-                        if channel.guild.id != guild.id:
-                            continue
-                        confirmations = rotina.get("confirmations", {}).get(today, {})
-                        for user_id_str, done in confirmations.items():
-                            if not done:
-                                continue
-                            try:
-                                user_id = int(user_id_str)
-                            except (TypeError, ValueError):
-                                continue
-                            user_confirmations[user_id].append(rotina.get("name", "Rotina"))
-                    if not user_confirmations:
-                        continue
-                    save_needed = False
-                    for user_id, names in user_confirmations.items():
-                        if not names:
-                            continue
-                        last_sent = guild_state.get(str(user_id))
-                        if last_sent == today:
-                            continue
-                        member = await self._ensure_member(guild, user_id)
-                        if member is None:
-                            continue
-                        try:
-                            lines = "\n".join(f"• {name}" for name in names)
-                            await member.send(
-                                "🌼 Resumo do dia: você marcou as rotinas de hoje!\n" f"{lines}\n\nAté amanhã 💛"
-                            )
-                            guild_state[str(user_id)] = today
-                            save_needed = True
-                            await self._mark_dm_success(user_id)
-                        except discord.Forbidden:
-                            channel = guild.system_channel
-                            if not isinstance(channel, discord.TextChannel):
-                                channel = None
-                            await self._handle_dm_blocked(user_id, channel)
-                        except Exception:
-                            logging.exception("Falha ao enviar resumo diário para %s", user_id)
-                    if save_needed:
-                        await self.store.save_data()
-            except asyncio.CancelledError:
-                raise
+                confirmed = rotina.get("confirmations", _EMPTY).get(today, _EMPTY)
+                await self._prefetch_members(
+                    channel.guild, [int(uid) for uid in user_ids if uid.isdigit() and not confirmed.get(uid)]
+                )
+                # Os envios de usuários diferentes são independentes; o semáforo limita quantos
+                # ficam em voo e o cliente HTTP do discord.py cuida dos limites de taxa.
+                results = await asyncio.gather(*(remind(uid) for uid in user_ids), return_exceptions=True)
+                for user_id_str, result in zip(user_ids, results):
+                    if isinstance(result, BaseException):
+                        logging.error("Falha ao lembrar %s da rotina %s", user_id_str, rotina.get("id"), exc_info=result)
+                    elif result:
+                        save_needed = True
             except Exception:
-                logging.exception("Erro no loop de resumos de rotina")
-            await asyncio.sleep(60)
+                logging.exception("Falha ao processar DMs da rotina %s", rotina.get("id"))
+            finally:
+                for user_id_str in user_ids:
+                    if user_id_str not in dropped:
+                        self._schedule_enrollment(
+                            rotina, user_id_str, not_before=now_ts + SCHEDULER_RETRY_SECONDS
+                        )
+        return save_needed
+
+    async def _tick_rotina_summaries(self, now_utc: datetime, now_ts: int) -> bool:
+        if now_ts < self._summary_not_before:
+            return False
+        changed = False
+        data = self.store.data
+        summaries = data.setdefault("rotina_summaries", {})
+        contexts: Dict[Optional[int], Any] = {}
+        rotinas_by_guild: Optional[Dict[int, List[Dict[str, Any]]]] = None
+        for guild in list(self.guilds):
+            tz = self.resolve_timezone(guild_id=guild.id)
+            now_local = now_utc.astimezone(tz)
+            today = now_local.date().isoformat()
+            if (now_local.hour, now_local.minute) < ROTINA_SUMMARY_START:
+                continue
+            # Dentro da janela a varredura se repete a cada minuto; sem confirmação nova não há o que enviar.
+            gate = (today, self._confirmation_version)
+            if self._summary_done.get(guild.id) == gate:
+                continue
+            if rotinas_by_guild is None:
+                rotinas_by_guild = defaultdict(list)
+                for rotina in data.get("global_habits", []):
+                    context = self._channel_context(rotina.get("channel_id"), now_utc, contexts)
+                    if context is not None:
+                        rotinas_by_guild[context[0].guild.id].append(rotina)
+            guild_state = summaries.setdefault(str(guild.id), {})
+            # Chaves continuam como str do JSON; quem já recebeu o resumo hoje nem entra na lista.
+            user_confirmations: Dict[str, List[str]] = defaultdict(list)
+            for rotina in rotinas_by_guild.get(guild.id, ()):
+                confirmations = rotina.get("confirmations", _EMPTY).get(today, _EMPTY)
+                for user_id_str, done in confirmations.items():
+                    if done and guild_state.get(user_id_str) != today:
+                        user_confirmations[user_id_str].append(rotina.get("name", "Rotina"))
+            if not user_confirmations:
+                self._summary_done[guild.id] = gate
+                continue
+            await self._prefetch_members(guild, [int(uid) for uid in user_confirmations if uid.isdigit()])
+            # Mesmo esquema dos lembretes: envios em paralelo, limitados pelo semáforo de DMs.
+            results = await asyncio.gather(
+                *(
+                    self._send_rotina_summary(guild, user_id_str, names, now_ts)
+                    for user_id_str, names in user_confirmations.items()
+                ),
+                return_exceptions=True,
+            )
+            for user_id_str, result in zip(user_confirmations, results):
+                if isinstance(result, BaseException):
+                    logging.error("Falha ao enviar resumo diário para %s", user_id_str, exc_info=result)
+                elif result:
+                    guild_state[user_id_str] = today
+                    changed = True
+            # Quem falhou (DM fechada, membro ausente) volta a ser tentado no próximo minuto.
+            if all(result is True for result in results):
+                self._summary_done[guild.id] = gate
+        return changed
+
+    async def _send_rotina_summary(self, guild: discord.Guild, user_id_str: str, names: List[str], now_ts: int) -> bool:
+        try:
+            user_id = int(user_id_str)
+        except (TypeError, ValueError):
+            return False
+        if self._dm_blocked_until(user_id) > now_ts:
+            return False
+        member = await self._ensure_member(guild, user_id)
+        if member is None:
+            return False
+        try:
+            lines = "\n".join(f"• {name}" for name in names)
+            async with self._dm_semaphore:
+                await member.send("🌼 Resumo do dia: você marcou as rotinas de hoje!\n" f"{lines}\n\nAté amanhã 💛")
+        except discord.Forbidden:
+            channel = guild.system_channel
+            await self._handle_dm_blocked(user_id, channel if isinstance(channel, discord.TextChannel) else None)
+            return False
+        await self._mark_dm_success(user_id)
+        return True
+
+    def _cached_fetch(self, key: Tuple[Optional[int], int]) -> Tuple[bool, Any]:
+        entry = self._fetch_cache.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            return False, None
+        return True, entry[1]
+
+    def _store_fetch(self, key: Tuple[Optional[int], int], value: Any) -> None:
+        now = time.monotonic()
+        if len(self._fetch_cache) >= FETCH_CACHE_MAX_ENTRIES:
+            for stale in [k for k, (expires, _) in self._fetch_cache.items() if expires < now]:
+                del self._fetch_cache[stale]
+            if len(self._fetch_cache) >= FETCH_CACHE_MAX_ENTRIES:
+                self._fetch_cache.clear()
+        self._fetch_cache[key] = (now + FETCH_CACHE_TTL_SECONDS, value)
 
     async def fetch_user_safe(self, user_id: int) -> Optional[discord.User]:
+        # Falhas também ficam no cache, para não repetir a chamada HTTP a cada ciclo.
+        hit, user = self._cached_fetch((None, user_id))
+        if hit:
+            return user
         try:
-            return await self.fetch_user(user_id)
+            user = await self.fetch_user(user_id)
         except Exception:
-            return None
+            user = None
+        self._store_fetch((None, user_id), user)
+        return user
 
     async def _fetch_member_safe(self, guild: discord.Guild, user_id: int) -> Optional[discord.Member]:
+        hit, member = self._cached_fetch((guild.id, user_id))
+        if hit:
+            return member
         try:
-            return await guild.fetch_member(user_id)
+            member = await guild.fetch_member(user_id)
         except Exception:
-            return None
+            member = None
+        self._store_fetch((guild.id, user_id), member)
+        return member
+
+    async def _prefetch_members(self, guild: discord.Guild, user_ids: List[int]) -> None:
+        # Um query_members pelo gateway (até 100 ids) no lugar de um fetch_member REST por usuário.
+        missing = [
+            user_id
+            for user_id in user_ids
+            if guild.get_member(user_id) is None and not self._cached_fetch((guild.id, user_id))[0]
+        ]
+        if len(missing) < 2:
+            return
+        for start in range(0, len(missing), MEMBER_QUERY_LIMIT):
+            chunk = missing[start : start + MEMBER_QUERY_LIMIT]
+            try:
+                members = await guild.query_members(user_ids=chunk, cache=True)
+            except Exception:
+                logging.warning("Falha ao buscar membros em lote na guilda %s", guild.id, exc_info=True)
+                return
+            found = {member.id for member in members}
+            for user_id in chunk:
+                if user_id not in found:
+                    # Ausente do servidor: o cache negativo evita o fetch individual logo em seguida.
+                    self._store_fetch((guild.id, user_id), None)
 
     async def _ensure_member(self, guild: discord.Guild, user_id: int) -> Optional[discord.Member]:
         member = guild.get_member(user_id)
@@ -875,19 +1873,13 @@ class CerebrosoBot(commands.Bot):
             return member
         return await self._fetch_member_safe(guild, user_id)
 
-    def _is_within_window(
-        self, ts: int, start: Optional[str], end: Optional[str], tz: ZoneInfo
-    ) -> bool:
+    def _is_within_window(self, minutes_now: int, start: Optional[str], end: Optional[str]) -> bool:
         if not start or not end:
             return True
-        hhmm_start = parse_hhmm(start)
-        hhmm_end = parse_hhmm(end)
-        if not hhmm_start or not hhmm_end:
+        start_min = hhmm_to_minutes(start)
+        end_min = hhmm_to_minutes(end)
+        if start_min is None or end_min is None:
             return True
-        dt = datetime.fromtimestamp(ts, tz=timezone.utc).astimezone(tz)
-        minutes_now = dt.hour * 60 + dt.minute
-        start_min = hhmm_start[0] * 60 + hhmm_start[1]
-        end_min = hhmm_end[0] * 60 + hhmm_end[1]
         if start_min <= end_min:
             return start_min <= minutes_now <= end_min
         return minutes_now >= start_min or minutes_now <= end_min
@@ -935,40 +1927,93 @@ class CerebrosoBot(commands.Bot):
         return None
 
     def _rotina_user_streak(self, rotina: Dict[str, Any], user_id: int) -> int:
-        confirmations = rotina.get("confirmations", {})
         channel = self.get_channel(rotina.get("channel_id"))
         guild_id = channel.guild.id if isinstance(channel, discord.TextChannel) else None
         tz = self.resolve_timezone(guild_id=guild_id)
         day = datetime.now(tz).date()
+        streaks = self._rotina_streaks.setdefault(rotina["id"], {})
+        cached = streaks.get(user_id)
+        if cached is not None and cached[0] == day.isoformat():
+            return cached[1]
+        streak = self._walk_rotina_streak(rotina, user_id, day)
+        if streak:
+            streaks[user_id] = (day.isoformat(), streak)
+        else:
+            streaks.pop(user_id, None)
+        return streak
+
+    def _walk_rotina_streak(self, rotina: Dict[str, Any], user_id: int, day: date) -> int:
+        confirmations = rotina.get("confirmations", {})
+        user_key = str(user_id)
         streak = 0
         while True:
             key = day.isoformat()
             users = confirmations.get(key, {})
-            if users.get(str(user_id)):
+            if users.get(user_key):
                 streak += 1
                 day -= timedelta(days=1)
                 continue
             break
         return streak
 
-    def _rotina_monthly_counts(self, rotina: Dict[str, Any], month_key: str) -> List[Tuple[int, int]]:
-        confirmations = rotina.get("confirmations", {})
-        counts: Dict[int, int] = defaultdict(int)
-        for day, users in confirmations.items():
-            if not isinstance(day, str) or not day.startswith(month_key):
+    def _rotina_month_index(self, rotina: Dict[str, Any]) -> Dict[str, Dict[int, int]]:
+        index = self._rotina_month_counts.get(rotina["id"])
+        if index is not None:
+            return index
+        index = {}
+        for day, users in rotina.get("confirmations", _EMPTY).items():
+            if not isinstance(day, str) or not isinstance(users, dict):
                 continue
+            counts = index.setdefault(day[:7], {})
             for user_id_str, confirmed in users.items():
                 if confirmed:
                     try:
                         uid = int(user_id_str)
                     except (TypeError, ValueError):
                         continue
-                    counts[uid] += 1
-        return sorted(
-            counts.items(),
-            key=lambda item: (item[1], self._rotina_user_streak(rotina, item[0]), -item[0]),
-            reverse=True,
-        )
+                    counts[uid] = counts.get(uid, 0) + 1
+        self._rotina_month_counts[rotina["id"]] = index
+        return index
+
+    def _note_rotina_confirmation(self, rotina: Dict[str, Any], date_key: str, user_id: int) -> None:
+        self._confirmation_version += 1
+        self._rotina_stats_cache.pop(rotina["id"], None)
+        index = self._rotina_month_counts.get(rotina["id"])
+        if index is not None:
+            counts = index.setdefault(date_key[:7], {})
+            counts[user_id] = counts.get(user_id, 0) + 1
+        streaks = self._rotina_streaks.get(rotina["id"])
+        if streaks is None:
+            return
+        cached = streaks.pop(user_id, None)
+        try:
+            yesterday = (date.fromisoformat(date_key) - timedelta(days=1)).isoformat()
+        except ValueError:
+            return
+        # Confirmar um dia antigo pode unir sequências; nesse caso recalcula na próxima leitura.
+        if cached is not None and cached[0] == yesterday:
+            streaks[user_id] = (date_key, cached[1] + 1)
+
+    def _rotina_monthly_leader(
+        self, rotina: Dict[str, Any], month_key: str, streaks: Optional[Dict[int, int]] = None
+    ) -> Optional[int]:
+        counts = self._rotina_month_index(rotina).get(month_key)
+        if not counts:
+            return None
+        best = max(counts.values())
+        tied = [uid for uid, count in counts.items() if count == best]
+        if len(tied) == 1:
+            return tied[0]
+        # Streak só desempata quem está empatado no topo; o resto nem precisa ser calculado.
+        if streaks is None:
+            streaks = {}
+
+        def streak_of(uid: int) -> int:
+            if uid not in streaks:
+                streaks[uid] = self._rotina_user_streak(rotina, uid)
+            return streaks[uid]
+
+        return max(tied, key=lambda uid: (streak_of(uid), -uid))
 
     async def _remove_role_from_member(self, guild: discord.Guild, role: discord.Role, user_id: int) -> None:
         member = guild.get_member(user_id) or await self._fetch_member_safe(guild, user_id)
@@ -998,10 +2043,7 @@ class CerebrosoBot(commands.Bot):
             logging.exception("Falha ao processar conquistas da rotina")
             return
         if changed:
-            try:
-                await self.store.save_data()
-            except Exception:
-                logging.exception("Falha ao salvar conquistas da rotina")
+            self.store.mark_dirty()
 
     async def _process_rotina_achievements(self, rotina: Dict[str, Any], user_id: int) -> bool:
         achievements, changed = self._ensure_rotina_achievements(rotina)
@@ -1013,15 +2055,13 @@ class CerebrosoBot(commands.Bot):
         if not member:
             return changed
 
+        streaks: Dict[int, int] = {}
         streak_roles = achievements.get("streak_roles", [])
         if isinstance(streak_roles, list) and streak_roles:
-            streak = self._rotina_user_streak(rotina, user_id)
+            streak = streaks[user_id] = self._rotina_user_streak(rotina, user_id)
             for entry in streak_roles:
-                try:
-                    role_id = entry.get("role_id")
-                    days = int(entry.get("days", 0))
-                except Exception:
-                    continue
+                role_id = entry.get("role_id")
+                days = entry["days"]
                 if not role_id or days <= 0:
                     continue
                 if streak >= days:
@@ -1043,7 +2083,7 @@ class CerebrosoBot(commands.Bot):
             return changed
         tz = self.resolve_timezone(guild_id=guild.id)
         month_key = datetime.now(tz).strftime("%Y-%m")
-        counts = self._rotina_monthly_counts(rotina, month_key)
+        top_user = self._rotina_monthly_leader(rotina, month_key, streaks)
         previous_month = monthly.get("month")
         previous_winner = monthly.get("winner_id")
         if previous_month and previous_month != month_key and previous_winner:
@@ -1052,8 +2092,7 @@ class CerebrosoBot(commands.Bot):
                 monthly["winner_id"] = None
                 changed = True
             previous_winner = None
-        if counts:
-            top_user, _ = counts[0]
+        if top_user is not None:
             if previous_winner != top_user:
                 if previous_winner:
                     await self._remove_role_from_member(guild, role, previous_winner)
@@ -1095,59 +2134,69 @@ class CerebrosoBot(commands.Bot):
         date_key: Optional[str] = None,
         guild_id: Optional[int] = None,
     ) -> None:
-        for rotina in self.store.data.get("global_habits", []):
-            if rotina.get("id") == rotina_id:
-                resolved_date = date_key
-                if resolved_date is None:
-                    channel = self.get_channel(rotina.get("channel_id"))
-                    resolved_guild_id = guild_id or (channel.guild.id if isinstance(channel, discord.TextChannel) else None)
-                    tz = self.resolve_timezone(guild_id=resolved_guild_id)
-                    resolved_date = today_key(tz=tz)
-                confirmations = rotina.setdefault("confirmations", {}).setdefault(resolved_date, {})
-                confirmations[str(user_id)] = True
-                enroll = rotina.setdefault("enrollments", {})
-                prefs = enroll.get(str(user_id))
-                if prefs:
-                    prefs["next_ts"] = int(time.time()) + max(5, int(prefs.get("interval_min", 90))) * 60
-                try:
-                    await self._process_rotina_achievements(rotina, user_id)
-                except Exception:
-                    logging.exception("Falha ao processar conquistas da rotina")
-                await self.store.save_data()
-                break
-
+        rotina = self._rotina_by_id.get(rotina_id)
+        if rotina is None:
+            return
+        resolved_date = date_key
+        if resolved_date is None:
+            channel = self.get_channel(rotina.get("channel_id"))
+            resolved_guild_id = guild_id or (channel.guild.id if isinstance(channel, discord.TextChannel) else None)
+            tz = self.resolve_timezone(guild_id=resolved_guild_id)
+            resolved_date = today_key(tz=tz)
+        confirmations = rotina.setdefault("confirmations", {}).setdefault(resolved_date, {})
+        user_key = str(user_id)
+        if confirmations.get(user_key):
+            return
+        self._note_rotina_confirmation(rotina, resolved_date, user_id)
+        confirmations[user_key] = True
+        self.store.append_op("rotina_confirmed", rotina_id=rotina_id, date=resolved_date, user_id=user_id)
+        prefs = rotina.get("enrollments", _EMPTY).get(user_key)
+        if prefs:
+            prefs["next_ts"] = int(time.time()) + max(5, int(prefs.get("interval_min", 90))) * 60
+        # Cargos dependem de chamadas REST; ficam em segundo plano para o botão responder logo.
+        self._spawn(self._process_rotina_achievements_and_save(rotina, user_id))
+
+    @tasks.loop()
     async def pomodoro_loop(self) -> None:
-        await self.wait_until_ready()
-        while not self.is_closed():
+        now_ts = int(time.time())
+        channels = self.store.data.get("channels", {})
+        for channel_id in self._pomodoro_schedule.pop_due(now_ts):
+            channel_data = channels.get(channel_id)
+            session = channel_data.get("session") if channel_data else None
+            if not session or not session.get("active") or session.get("paused"):
+                continue
+            if not isinstance(self.get_channel(int(channel_id)), discord.TextChannel):
+                # Canal apagado ou inacessível: encerra a sessão em vez de tentar (e gravar) a cada tick.
+                logging.warning("Canal %s do Pomodoro não está acessível; sessão encerrada", channel_id)
+                channel_data["session"] = None
+                self._schedule_pomodoro(channel_id, None)
+                self.store.mark_dirty()
+                continue
+            # Cada canal falha sozinho: os demais já saíram da agenda e precisam ser processados.
             try:
-                now_ts = int(time.time())
-                changed = False
-                for channel_id, channel_data in list(self.store.data.get("channels", {}).items()):
-                    session = channel_data.get("session")
-                    if not session or not session.get("active"):
-                        continue
-                    if session.get("paused"):
-                        continue
-                    last_ts = session.get("last_ts", now_ts)
-                    delta = now_ts - last_ts
-                    if delta <= 0:
-                        continue
-                    session["remaining"] = max(0, int(session.get("remaining", 0)) - delta)
-                    session["last_ts"] = now_ts
-                    if session["remaining"] <= 0:
-                        await self._advance_pomodoro(channel_id, channel_data)
-                        changed = True
-                        continue
-                    changed = True
-                if changed:
-                    await self.store.save_data()
-            except asyncio.CancelledError:
-                raise
+                settle_pomodoro(session, now_ts)
+                if session["remaining"] <= 0:
+                    await self._advance_pomodoro(channel_id, channel_data, now_ts)
+                    self.store.mark_dirty()
             except Exception:
-                logging.exception("Erro no loop de Pomodoro")
-            await asyncio.sleep(5)
+                logging.exception("Erro no loop de Pomodoro (canal %s)", channel_id)
+            finally:
+                self._schedule_pomodoro(
+                    channel_id, channel_data.get("session"), not_before=now_ts + POMODORO_RETRY_SECONDS
+                )
+        self._pomodoro_wake.clear()
+        next_ts = self._pomodoro_schedule.next_ts()
+        timeout = None if next_ts is None else max(0.0, next_ts - time.time())
+        try:
+            await asyncio.wait_for(self._pomodoro_wake.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    @pomodoro_loop.before_loop
+    async def _before_pomodoro_loop(self) -> None:
+        await self.wait_until_ready()
 
-    async def _advance_pomodoro(self, channel_id: str, channel_data: Dict[str, Any]) -> None:
+    async def _advance_pomodoro(self, channel_id: str, channel_data: Dict[str, Any], now_ts: int) -> None:
         config = channel_data.get("config", default_pomodoro_config())
         session = channel_data.get("session", {})
         channel = self.get_channel(int(channel_id))
@@ -1164,202 +2213,169 @@ class CerebrosoBot(commands.Bot):
             else:
                 session["phase"] = "pausa_curta"
                 session["remaining"] = int(config.get("short_break_seconds", 300))
-            await channel.send(self._pomodoro_phase_message(session["phase"], session["remaining"]))
+            await channel.send(self._pomodoro_phase_message(session["phase"], session["remaining"], now_ts))
         elif phase == "pausa_curta":
             session["phase"] = "foco"
             session["remaining"] = int(config.get("focus_seconds", 1500))
-            await channel.send(self._pomodoro_phase_message(session["phase"], session["remaining"]))
+            await channel.send(self._pomodoro_phase_message(session["phase"], session["remaining"], now_ts))
         elif phase == "pausa_longa":
             session["phase"] = "foco"
             session["remaining"] = int(config.get("focus_seconds", 1500))
-            await channel.send("🎉 Ciclo completo concluído! Preparados para outra rodada de foco?")
-            await channel.send(self._pomodoro_phase_message(session["phase"], session["remaining"]))
-        session["last_ts"] = int(time.time())
+            await channel.send(
+                "🎉 Ciclo completo concluído! Preparados para outra rodada de foco?\n"
+                + self._pomodoro_phase_message(session["phase"], session["remaining"], now_ts)
+            )
+        session["last_ts"] = now_ts
         channel_data["session"] = session
 
-    def _pomodoro_phase_message(self, phase: str, remaining: int) -> str:
-        icon = {"foco": "🧠", "pausa_curta": "☕", "pausa_longa": "🛌"}.get(phase, "🧠")
-        target_ts = int(time.time()) + remaining
-        return f"{icon} Fase: **{phase.replace('_', ' ')}** termina <t:{target_ts}:R> (às <t:{target_ts}:T>)"
+    def _pomodoro_phase_message(self, phase: str, remaining: int, now_ts: int) -> str:
+        icon = PHASE_ICONS.get(phase, "🧠")
+        label = PHASE_LABELS.get(phase) or phase.replace("_", " ")
+        target_ts = now_ts + remaining
+        return f"{icon} Fase: **{label}** termina <t:{target_ts}:R> (às <t:{target_ts}:T>)"
 
     async def send_pomodoro_start(self, channel: discord.TextChannel, channel_data: Dict[str, Any]) -> None:
         config = channel_data.setdefault("config", default_pomodoro_config())
+        now_ts = int(time.time())
         session = {
             "active": True,
             "phase": "foco",
             "remaining": int(config.get("focus_seconds", 1500)),
             "cycle": 0,
-            "participants": [],
+            "participants": set(),
             "paused": False,
-            "last_ts": int(time.time()),
+            "last_ts": now_ts,
         }
         channel_data["session"] = session
-        view = PomodoroView(self, channel.id)
         message = await channel.send(
-            "🧠 Pomodoro iniciado! Clique para participar.", view=view
+            "🧠 Pomodoro iniciado! Clique para participar.", view=self._pomodoro_view
         )
         session["message_id"] = message.id
         channel_data["session"] = session
-        await channel.send(self._pomodoro_phase_message("foco", session["remaining"]))
-        await self.store.save_data()
+        await channel.send(self._pomodoro_phase_message("foco", session["remaining"], now_ts))
+        self._schedule_pomodoro(str(channel.id), session)
+        self.store.mark_dirty()
 
     async def on_raw_reaction_add(self, payload: discord.RawReactionActionEvent) -> None:
+        if payload.message_id not in self._tracked_message_ids:
+            return
         if self.user and payload.user_id == self.user.id:
             return
         await self._handle_habit_reaction(payload)
         await self._handle_rotina_reaction(payload)
 
     async def _handle_habit_reaction(self, payload: discord.RawReactionActionEvent) -> None:
-        for habit in self.store.data.get("habits", []):
-            if habit.get("last_message_id") == payload.message_id and habit.get("emoji", "✅") == str(payload.emoji):
-                last_channel_id = habit.get("last_channel_id")
-                if last_channel_id and last_channel_id != payload.channel_id:
-                    continue
-                if habit.get("user_id") != payload.user_id:
-                    continue
-                progress = habit.setdefault("progress", {})
-                guild_id = habit.get("guild_id") or payload.guild_id
-                if guild_id is None:
-                    channel = self.get_channel(habit.get("channel_id"))
-                    if isinstance(channel, discord.TextChannel):
-                        guild_id = channel.guild.id
-                tz = self.resolve_timezone(guild_id=guild_id, user_id=payload.user_id)
-                today = today_key(tz=tz)
-                progress[today] = progress.get(today, 0) + 1
-                if progress[today] >= habit.get("goal_per_day", 1):
-                    habit["next_ts"] = int(time.time()) + 3600
-                await self.store.save_data()
-                user = self.get_user(payload.user_id) or await self.fetch_user_safe(payload.user_id)
-                if user:
-                    try:
-                        await user.send(random.choice(CUTE_MESSAGES))
-                    except Exception:
-                        pass
-                break
+        habit = self._habit_msg_index.get((payload.message_id, str(payload.emoji)))
+        if habit is None:
+            return
+        last_channel_id = habit.get("last_channel_id")
+        if last_channel_id and last_channel_id != payload.channel_id:
+            return
+        if habit.get("user_id") != payload.user_id:
+            return
+        guild_id = habit.get("guild_id") or payload.guild_id
+        if guild_id is None:
+            channel = self.get_channel(habit.get("channel_id"))
+            if isinstance(channel, discord.TextChannel):
+                guild_id = channel.guild.id
+        tz = self.resolve_timezone(guild_id=guild_id, user_id=payload.user_id)
+        today = today_key(tz=tz)
+        if add_habit_progress(habit, today, 1) >= habit.get("goal_per_day", 1):
+            habit["next_ts"] = int(time.time()) + 3600
+        self.store.mark_dirty()
+        user = self.get_user(payload.user_id) or await self.fetch_user_safe(payload.user_id)
+        if user:
+            try:
+                await user.send(pick_cute_message())
+            except Exception:
+                pass
 
     async def _handle_rotina_reaction(self, payload: discord.RawReactionActionEvent) -> None:
-        tz = self.resolve_timezone(guild_id=payload.guild_id)
-        today = today_key(tz=tz)
-        for rotina in self.store.data.get("global_habits", []):
-            ann = rotina.get("announcements", {}).get(today)
-            if not ann:
-                continue
-            if ann.get("message_id") != payload.message_id:
-                continue
-            if str(payload.emoji) != rotina.get("emoji", "✅"):
-                continue
-            await self.confirmar_rotina(rotina["id"], payload.user_id, guild_id=payload.guild_id)
+        tracked = self._rotina_by_message.get(payload.message_id)
+        if tracked is None:
+            return
+        rotina, day = tracked
+        if str(payload.emoji) != rotina.get("emoji", "✅"):
+            return
+        if day != today_key(tz=self.resolve_timezone(guild_id=payload.guild_id)):
+            return
+        await self.confirmar_rotina(rotina["id"], payload.user_id, guild_id=payload.guild_id)
 
     async def _rotina_autocomplete(
         self, interaction: discord.Interaction, current: str
     ) -> List[app_commands.Choice[str]]:
         _ = interaction
+        if current.isdigit():
+            rotina = self._rotina_by_id.get(int(current))
+            if rotina is None:
+                return []
+            name = rotina.get("name", "Rotina")
+            return [app_commands.Choice(name=f"{rotina['id']} — {name}", value=str(rotina['id']))]
         current_lower = current.lower()
         choices = []
-        for rotina in self.store.data.get("global_habits", [])[:25]:
-            name = rotina.get("name", "Rotina")
-            if not current or current_lower in name.lower():
-                choices.append(app_commands.Choice(name=f"{rotina['id']} — {name}", value=str(rotina['id'])))
-        return choices[:25]
+        for name_lower, rotina_id in self._rotina_names:
+            if current_lower in name_lower:
+                rotina = self._rotina_by_id[rotina_id]
+                name = rotina.get("name", "Rotina")
+                choices.append(app_commands.Choice(name=f"{rotina_id} — {name}", value=str(rotina_id)))
+                if len(choices) >= 25:
+                    break
+        return choices
+
+    def _enrollment_prefs(self, rotina: Dict[str, Any], user_id_str: str) -> Dict[str, Any]:
+        # Só aloca os dicts padrão quando a inscrição (ou a janela) ainda não existe.
+        enroll = rotina.get("enrollments")
+        if enroll is None:
+            enroll = rotina["enrollments"] = {}
+        prefs = enroll.get(user_id_str)
+        if prefs is None:
+            prefs = enroll[user_id_str] = {}
+            self._enrollments_by_user[user_id_str].add(rotina["id"])
+        if "quiet" not in prefs:
+            prefs["quiet"] = dict(_DEFAULT_QUIET)
+        return prefs
+
+    def _drop_enrollment(self, rotina: Dict[str, Any], user_id_str: str) -> bool:
+        enroll = rotina.get("enrollments")
+        if not enroll or not enroll.pop(user_id_str, None):
+            return False
+        self._rotina_dm_schedule.discard((rotina["id"], user_id_str))
+        self._enrollments_by_user[user_id_str].discard(rotina["id"])
+        return True
 
     def _find_rotina(self, identifier: str) -> Optional[Dict[str, Any]]:
         if identifier.isdigit():
-            rid = int(identifier)
-            for rotina in self.store.data.get("global_habits", []):
-                if rotina.get("id") == rid:
-                    return rotina
-        lowered = identifier.lower()
-        for rotina in self.store.data.get("global_habits", []):
-            name = rotina.get("name", "").lower()
-            if name == lowered:
-                return rotina
-        for rotina in self.store.data.get("global_habits", []):
-            name = rotina.get("name", "").lower()
-            if name.startswith(lowered):
-                return rotina
-        for rotina in self.store.data.get("global_habits", []):
-            if lowered in rotina.get("name", "").lower():
+            rotina = self._rotina_by_id.get(int(identifier))
+            if rotina is not None:
                 return rotina
+        lowered = identifier.lower()
+        rotina = self._rotina_by_name.get(lowered)
+        if rotina is not None:
+            return rotina
+        pos = bisect.bisect_left(self._rotina_names, (lowered,))
+        if pos < len(self._rotina_names) and self._rotina_names[pos][0].startswith(lowered):
+            return self._rotina_by_id.get(self._rotina_names[pos][1])
+        # Nomes já ficam em minúsculas no índice; o fallback por trecho não refaz lower().
+        for name_lower, rotina_id in self._rotina_names:
+            if lowered in name_lower:
+                return self._rotina_by_id.get(rotina_id)
         return None
 
     def _register_commands(self) -> None:
         tree = self.tree
+        # O conteúdo da ajuda é fixo: monta o embed uma vez e reaproveita em todo /cerebroso.
+        help_embed = discord.Embed(
+            title=CEREBROSO_HELP_TITLE,
+            description=CEREBROSO_HELP_DESCRIPTION,
+            color=discord.Color.blurple(),
+        )
+        for name, value in CEREBROSO_HELP_FIELDS:
+            help_embed.add_field(name=name, value=value, inline=False)
+        help_embed.set_footer(text=CEREBROSO_HELP_FOOTER)
 
         @tree.command(name="cerebroso", description="Ajuda geral do Cerebroso")
         async def cerebroso_help(interaction: discord.Interaction) -> None:
-            embed = discord.Embed(
-                title="🧠✨ Cerebroso — seu companheiro de foco e autocuidado!",
-                description=(
-                    "O Cerebroso é o bot do Ninho que te ajuda a **criar hábitos saudáveis**, "
-                    "**lembrar de cuidar de si** e **manter o foco** — tudo de um jeitinho leve e acolhedor 💛\n\n"
-                    "Use **`/cerebroso`** pra ver o guia completo direto no Discord."
-                ),
-                color=discord.Color.blurple(),
-            )
-
-            embed.add_field(
-                name="🍅 Pomodoro de Canal — modo foco em grupo",
-                value=(
-                    "Precisa de companhia pra se concentrar?\n"
-                    "O comando `/pomodoro iniciar` abre uma sessão de foco no canal.\n"
-                    "Você pode **participar**, **pausar** ou **ver o status** da sessão.\n\n"
-                    "💡 Trabalhe em blocos de tempo, com pausas entre eles — perfeito pra cérebro TDAH!"
-                ),
-                inline=False,
-            )
-
-            embed.add_field(
-                name="⏰ Lembretes pessoais — cuide de si no seu ritmo",
-                value=(
-                    "Receba lembretes por DM pra não esquecer do básico:\n"
-                    "`/lembrete criar texto:'Beber água' quando:'+45m'`\n"
-                    "`/lembrete listar` • `/lembrete cancelar id:1`\n\n"
-                    "🕒 Use tempos como `+10m`, `+2h` ou `18:00`. Ideal pra lembrar de pausas, remédios ou autocuidado."
-                ),
-                inline=False,
-            )
-
-            embed.add_field(
-                name="🌱 Hábitos pessoais — pequenas metas diárias",
-                value=(
-                    "Acompanhe seus hábitos com carinho!\n"
-                    "`/habito criar nome:'Água' meta:8 intervalo_minutos:60 emoji:'💧'`\n"
-                    "`/habito listar` • `/habito marcar id:1`\n\n"
-                    "💧 Cada vez que marcar, o Cerebroso te manda uma mensagem fofa de incentivo 🩷"
-                ),
-                inline=False,
-            )
-
-            embed.add_field(
-                name="🌼 Rotinas da Comunidade — cuidando juntinhos",
-                value=(
-                    "Rotinas compartilhadas aparecem no canal do dia com um botão **Fiz!** ✨\n"
-                    "`/rotina listar` — veja as rotinas disponíveis\n"
-                    "`/rotina entrar nome:'Escovar os dentes' intervalo_minutos:90 dm:true`\n"
-                    "`/rotina preferencias nome:'Escovar os dentes' janela_inicio:08:00 janela_fim:22:00`\n"
-                    "`/rotina leaderboard` — ranking geral\n"
-                    "`/rotina leaderboard nome:'Escovar os dentes'` — ranking da rotina específica\n\n"
-                    "🎖️ Confirmar pausa seus lembretes até o dia seguinte. Cada check é uma conquista!"
-                ),
-                inline=False,
-            )
-
-            embed.add_field(
-                name="📚 Exemplos rápidos",
-                value=(
-                    "`/pomodoro iniciar`\n"
-                    "`/lembrete criar texto:'Alongar' quando:'18:00'`\n"
-                    "`/habito criar nome:'Leitura' meta:1 intervalo_minutos:120 emoji:'📚'`\n"
-                    "`/rotina entrar nome:'Escovar os dentes' intervalo_minutos:60 dm:true`"
-                ),
-                inline=False,
-            )
-
-            embed.set_footer(
-                text="🌿 O Cerebroso não cobra — ele te apoia. Cada passinho já é progresso 💛"
-            )
-
-            await interaction.response.send_message(embed=embed)
+            await interaction.response.send_message(embed=help_embed)
 
         self._general_commands = [cerebroso_help]
 
@@ -1380,7 +2396,7 @@ class CerebrosoBot(commands.Bot):
                 return
             if limpar:
                 self.clear_guild_timezone(interaction.guild.id)
-                await self.store.save_data()
+                self.store.mark_dirty()
                 current = self.get_timezone_name(guild_id=interaction.guild.id)
                 await interaction.response.send_message(
                     f"Fuso horário restaurado para {current}.", ephemeral=True
@@ -1398,7 +2414,7 @@ class CerebrosoBot(commands.Bot):
                 await interaction.response.send_message("Fuso horário inválido.", ephemeral=True)
                 return
             self.set_guild_timezone(interaction.guild.id, fuso)
-            await self.store.save_data()
+            self.store.mark_dirty()
             await interaction.response.send_message(
                 f"Fuso horário da guilda atualizado para **{fuso}**.", ephemeral=True
             )
@@ -1414,10 +2430,10 @@ class CerebrosoBot(commands.Bot):
                 for cmd in self._staff_commands:
                     tree.add_command(cmd)
                 await tree.sync()
+                self._add_global_commands()
                 for guild in self.guilds:
                     tree.clear_commands(guild=guild)
-                    self._register_guild_commands(guild)
-                    await tree.sync(guild=guild)
+                    await self._sync_guild_commands(guild, force=True)
                 await interaction.followup.send("Comandos globais limpos e sincronizados por servidor.", ephemeral=True)
             except Exception:
                 logging.exception("Erro no purgeglobal")
@@ -1435,8 +2451,7 @@ class CerebrosoBot(commands.Bot):
                     await interaction.followup.send("Use em um servidor.", ephemeral=True)
                     return
                 self.tree.clear_commands(guild=guild)
-                self._register_guild_commands(guild)
-                await self.tree.sync(guild=guild)
+                await self._sync_guild_commands(guild, force=True)
                 await interaction.followup.send("Comandos re-sincronizados com sucesso!", ephemeral=True)
             except Exception:
                 logging.exception("Erro no syncfix")
@@ -1447,10 +2462,7 @@ class CerebrosoBot(commands.Bot):
             if not has_manage_permission(interaction.user):
                 await interaction.response.send_message("Você precisa de permissão de gerenciamento.", ephemeral=True)
                 return
-            entries = []
-            for cmd in self.tree.walk_commands():
-                entries.append(cmd.qualified_name)
-            await interaction.response.send_message("Comandos registrados:\n" + "\n".join(entries), ephemeral=True)
+            await interaction.response.send_message(self._debugslash_text, ephemeral=True)
 
         self._staff_commands = [purge_global, syncfix, debugslash]
 
@@ -1469,7 +2481,7 @@ class CerebrosoBot(commands.Bot):
                 return
             await interaction.response.defer(ephemeral=True)
             channel_id = str(interaction.channel.id)
-            channel_data = self.store.data.setdefault("channels", {}).setdefault(channel_id, {"config": default_pomodoro_config(), "session": None})
+            channel_data = self._channel_data(channel_id)
             await self.send_pomodoro_start(interaction.channel, channel_data)
             await interaction.followup.send("Pomodoro iniciado!", ephemeral=True)
 
@@ -1484,10 +2496,12 @@ class CerebrosoBot(commands.Bot):
                 await interaction.response.send_message("Nenhum Pomodoro ativo aqui.", ephemeral=True)
                 return
             session = channel_data["session"]
-            participants = session.get("participants", [])
+            participants = sorted(session.get("participants", []))
             embed = discord.Embed(title="Status do Pomodoro", colour=discord.Colour.green())
             embed.add_field(name="Fase", value=session.get("phase", "foco"))
-            embed.add_field(name="Tempo restante", value=seconds_to_human(int(session.get("remaining", 0))), inline=False)
+            embed.add_field(
+                name="Tempo restante", value=seconds_to_human(pomodoro_remaining(session, int(time.time()))), inline=False
+            )
             embed.add_field(name="Ciclo", value=str(session.get("cycle", 0)))
             if participants:
                 mentions = [f"<@{pid}>" for pid in participants]
@@ -1513,7 +2527,8 @@ class CerebrosoBot(commands.Bot):
                 await interaction.response.send_message("Nenhum Pomodoro ativo.", ephemeral=True)
                 return
             channel_data["session"] = None
-            await self.store.save_data()
+            self._schedule_pomodoro(channel_id, None)
+            self.store.mark_dirty()
             await interaction.response.send_message("Pomodoro encerrado.", ephemeral=True)
 
         @group.command(name="reiniciar", description="Reinicia o Pomodoro")
@@ -1523,7 +2538,7 @@ class CerebrosoBot(commands.Bot):
                 return
             await interaction.response.defer(ephemeral=True)
             channel_id = str(interaction.channel.id)
-            channel_data = self.store.data.setdefault("channels", {}).setdefault(channel_id, {"config": default_pomodoro_config(), "session": None})
+            channel_data = self._channel_data(channel_id)
             channel_data["session"] = None
             await self.send_pomodoro_start(interaction.channel, channel_data)
             await interaction.followup.send("Pomodoro reiniciado!", ephemeral=True)
@@ -1544,14 +2559,14 @@ class CerebrosoBot(commands.Bot):
                 await interaction.response.send_message("Execute em um canal de texto.", ephemeral=True)
                 return
             channel_id = str(interaction.channel.id)
-            channel_data = self.store.data.setdefault("channels", {}).setdefault(channel_id, {"config": default_pomodoro_config(), "session": None})
+            channel_data = self._channel_data(channel_id)
             channel_data["config"] = {
                 "focus_seconds": foco * 60,
                 "short_break_seconds": pausa_curta * 60,
                 "long_break_seconds": pausa_longa * 60,
                 "cycles_before_long": ciclos,
             }
-            await self.store.save_data()
+            self.store.mark_dirty()
             await interaction.response.send_message("Configuração atualizada!", ephemeral=True)
 
     async def _set_pomodoro_pause(self, interaction: discord.Interaction, paused: bool) -> None:
@@ -1564,9 +2579,10 @@ class CerebrosoBot(commands.Bot):
             await interaction.response.send_message("Nenhum Pomodoro ativo.", ephemeral=True)
             return
         session = channel_data["session"]
+        settle_pomodoro(session, int(time.time()))
         session["paused"] = paused
-        session["last_ts"] = int(time.time())
-        await self.store.save_data()
+        self._schedule_pomodoro(channel_id, session)
+        self.store.mark_dirty()
         await interaction.response.send_message("Pomodoro pausado." if paused else "Pomodoro retomado!", ephemeral=True)
 
     def _register_lembrete_commands(self) -> None:
@@ -1589,15 +2605,21 @@ class CerebrosoBot(commands.Bot):
                 "created_ts": int(time.time()),
             }
             self.store.data.setdefault("reminders", []).append(reminder)
-            await self.store.save_data()
+            self._reminder_schedule.schedule(reminder["id"], ts, reminder)
+            self._scheduler_wake.set()
+            self.store.mark_dirty()
             await interaction.response.send_message("Lembrete criado!", ephemeral=True)
 
         @group.command(name="listar", description="Lista seus lembretes")
         async def listar(interaction: discord.Interaction) -> None:
-            reminders = [r for r in self.store.data.get("reminders", []) if r.get("user_id") == interaction.user.id and not r.get("delivered")]
-            reminders.sort(key=lambda x: x.get("when_ts", 0))
+            # Pendentes estão todos na agenda; entregues antigos nem entram na varredura.
+            reminders = heapq.nsmallest(
+                10,
+                (r for r in self._reminder_schedule.items() if r.get("user_id") == interaction.user.id),
+                key=lambda x: x.get("when_ts", 0),
+            )
             lines = []
-            for reminder in reminders[:10]:
+            for reminder in reminders:
                 lines.append(f"#{reminder['id']}: {reminder['text']} — <t:{reminder['when_ts']}:R>")
             if not lines:
                 lines.append("Nenhum lembrete pendente.")
@@ -1605,14 +2627,14 @@ class CerebrosoBot(commands.Bot):
 
         @group.command(name="cancelar", description="Cancela um lembrete")
         async def cancelar(interaction: discord.Interaction, id: int) -> None:
-            reminders = self.store.data.get("reminders", [])
-            for reminder in reminders:
-                if reminder.get("id") == id and reminder.get("user_id") == interaction.user.id:
-                    reminder["delivered"] = True
-                    await self.store.save_data()
-                    await interaction.response.send_message("Lembrete cancelado.", ephemeral=True)
-                    return
-            await interaction.response.send_message("Lembrete não encontrado.", ephemeral=True)
+            reminder = self._reminder_schedule.get(id)
+            if reminder is None or reminder.get("user_id") != interaction.user.id:
+                await interaction.response.send_message("Lembrete não encontrado.", ephemeral=True)
+                return
+            reminder["delivered"] = True
+            self._reminder_schedule.discard(id)
+            self.store.append_op("reminder_delivered", id=id)
+            await interaction.response.send_message("Lembrete cancelado.", ephemeral=True)
 
         @group.command(name="timezone", description="Define seu fuso horário pessoal")
         @app_commands.describe(fuso="Ex.: America/Sao_Paulo", limpar="Voltar ao padrão do servidor")
@@ -1623,7 +2645,7 @@ class CerebrosoBot(commands.Bot):
         ) -> None:
             if limpar:
                 self.clear_user_timezone(interaction.user.id)
-                await self.store.save_data()
+                self.store.mark_dirty()
                 resolved = self.get_timezone_name(guild_id=interaction.guild_id, user_id=interaction.user.id)
                 await interaction.response.send_message(
                     f"Fuso horário pessoal removido. Usando agora: **{resolved}**.", ephemeral=True
@@ -1641,7 +2663,7 @@ class CerebrosoBot(commands.Bot):
                 await interaction.response.send_message("Fuso horário inválido.", ephemeral=True)
                 return
             self.set_user_timezone(interaction.user.id, fuso)
-            await self.store.save_data()
+            self.store.mark_dirty()
             await interaction.response.send_message(
                 f"Fuso horário pessoal atualizado para **{fuso}**.", ephemeral=True
             )
@@ -1675,10 +2697,11 @@ class CerebrosoBot(commands.Bot):
                 "active": True,
                 "next_ts": int(time.time()),
                 "last_message_id": None,
-                "progress": {},
             }
             self.store.data.setdefault("habits", []).append(habit)
-            await self.store.save_data()
+            self._habits_by_id[habit["id"]] = habit
+            self._schedule_habit(habit)
+            self.store.mark_dirty()
             await interaction.response.send_message("Hábito criado com sucesso!", ephemeral=True)
 
         @group.command(name="listar", description="Lista seus hábitos")
@@ -1686,12 +2709,13 @@ class CerebrosoBot(commands.Bot):
             tz = self.resolve_timezone(guild_id=interaction.guild_id, user_id=interaction.user.id)
             today = today_key(tz=tz)
             lines = []
+            now_ts = int(time.time())
             for habit in self.store.data.get("habits", []):
                 if habit.get("user_id") != interaction.user.id:
                     continue
-                progress = habit.get("progress", {}).get(today, 0)
+                progress = habit_today_count(habit, today)
                 lines.append(
-                    f"#{habit['id']} {habit['emoji']} {habit['name']} — {progress}/{habit['goal_per_day']} hoje — próximo em {seconds_to_human(max(0, habit.get('next_ts', int(time.time())) - int(time.time())))}"
+                    f"#{habit['id']} {habit['emoji']} {habit['name']} — {progress}/{habit['goal_per_day']} hoje — próximo em {seconds_to_human(max(0, habit.get('next_ts', now_ts) - now_ts))}"
                 )
             if not lines:
                 lines.append("Nenhum hábito cadastrado.")
@@ -1700,7 +2724,7 @@ class CerebrosoBot(commands.Bot):
         @group.command(name="pausar", description="Pausa um hábito")
         async def pausar(interaction: discord.Interaction, id: int) -> None:
             if self._toggle_habit(interaction.user.id, id, False):
-                await self.store.save_data()
+                self.store.mark_dirty()
                 await interaction.response.send_message("Hábito pausado.", ephemeral=True)
             else:
                 await interaction.response.send_message("Hábito não encontrado.", ephemeral=True)
@@ -1708,34 +2732,39 @@ class CerebrosoBot(commands.Bot):
         @group.command(name="retomar", description="Retoma um hábito")
         async def retomar(interaction: discord.Interaction, id: int) -> None:
             if self._toggle_habit(interaction.user.id, id, True):
-                await self.store.save_data()
+                self.store.mark_dirty()
                 await interaction.response.send_message("Hábito retomado.", ephemeral=True)
             else:
                 await interaction.response.send_message("Hábito não encontrado.", ephemeral=True)
 
         @group.command(name="deletar", description="Remove um hábito")
         async def deletar(interaction: discord.Interaction, id: int) -> None:
+            habit = self._user_habit(interaction.user.id, id)
+            if habit is None:
+                await interaction.response.send_message("Hábito não encontrado.", ephemeral=True)
+                return
             habits = self.store.data.get("habits", [])
-            for habit in list(habits):
-                if habit.get("id") == id and habit.get("user_id") == interaction.user.id:
-                    habits.remove(habit)
-                    await self.store.save_data()
-                    await interaction.response.send_message("Hábito deletado.", ephemeral=True)
-                    return
-            await interaction.response.send_message("Hábito não encontrado.", ephemeral=True)
+            # Busca por identidade: list.remove compararia os dicts campo a campo.
+            index = next(i for i, candidate in enumerate(habits) if candidate is habit)
+            del habits[index]
+            self._unindex_habit(habit)
+            self._habit_schedule.discard(id)
+            self.store.mark_dirty()
+            await interaction.response.send_message("Hábito deletado.", ephemeral=True)
 
         @group.command(name="meta", description="Atualiza a meta diária")
         async def meta(interaction: discord.Interaction, id: int, nova_meta: int) -> None:
             if nova_meta <= 0:
                 await interaction.response.send_message("Meta inválida.", ephemeral=True)
                 return
-            for habit in self.store.data.get("habits", []):
-                if habit.get("id") == id and habit.get("user_id") == interaction.user.id:
-                    habit["goal_per_day"] = nova_meta
-                    await self.store.save_data()
-                    await interaction.response.send_message("Meta atualizada!", ephemeral=True)
-                    return
-            await interaction.response.send_message("Hábito não encontrado.", ephemeral=True)
+            habit = self._user_habit(interaction.user.id, id)
+            if habit is None:
+                await interaction.response.send_message("Hábito não encontrado.", ephemeral=True)
+                return
+            habit["goal_per_day"] = nova_meta
+            self._schedule_habit(habit)
+            self.store.mark_dirty()
+            await interaction.response.send_message("Meta atualizada!", ephemeral=True)
 
         @group.command(name="marcar", description="Marca progresso manualmente")
         async def marcar(interaction: discord.Interaction, id: int, quantidade: Optional[int] = 1) -> None:
@@ -1743,23 +2772,22 @@ class CerebrosoBot(commands.Bot):
             if quantidade <= 0:
                 await interaction.response.send_message("Quantidade inválida.", ephemeral=True)
                 return
-            for habit in self.store.data.get("habits", []):
-                if habit.get("id") == id and habit.get("user_id") == interaction.user.id:
-                    progress = habit.setdefault("progress", {})
-                    tz = self.resolve_timezone(guild_id=interaction.guild_id, user_id=interaction.user.id)
-                    today = today_key(tz=tz)
-                    progress[today] = progress.get(today, 0) + quantidade
-                    await self.store.save_data()
-                    await interaction.response.send_message("Progresso registrado!", ephemeral=True)
-                    return
-            await interaction.response.send_message("Hábito não encontrado.", ephemeral=True)
+            habit = self._user_habit(interaction.user.id, id)
+            if habit is None:
+                await interaction.response.send_message("Hábito não encontrado.", ephemeral=True)
+                return
+            tz = self.resolve_timezone(guild_id=interaction.guild_id, user_id=interaction.user.id)
+            add_habit_progress(habit, today_key(tz=tz), quantidade)
+            self.store.mark_dirty()
+            await interaction.response.send_message("Progresso registrado!", ephemeral=True)
 
     def _toggle_habit(self, user_id: int, habit_id: int, active: bool) -> bool:
-        for habit in self.store.data.get("habits", []):
-            if habit.get("id") == habit_id and habit.get("user_id") == user_id:
-                habit["active"] = active
-                return True
-        return False
+        habit = self._user_habit(user_id, habit_id)
+        if habit is None:
+            return False
+        habit["active"] = active
+        self._schedule_habit(habit)
+        return True
 
     def _register_rotina_commands(self) -> None:
         group = self.rotina_group
@@ -1798,7 +2826,9 @@ class CerebrosoBot(commands.Bot):
                 },
             }
             self.store.data.setdefault("global_habits", []).append(rotina)
-            await self.store.save_data()
+            self._index_rotina(rotina)
+            self._schedule_announcement(rotina)
+            self.store.mark_dirty()
             await interaction.response.send_message("Rotina criada!", ephemeral=True)
 
         rotina_autocomplete = app_commands.autocomplete(nome_ou_id=self._rotina_autocomplete)
@@ -1847,7 +2877,8 @@ class CerebrosoBot(commands.Bot):
                 await interaction.response.send_message("Rotina não encontrada.", ephemeral=True)
                 return
             rotina["active"] = False
-            await self.store.save_data()
+            self._announcement_schedule.discard(rotina["id"])
+            self.store.append_op("rotina_updated", rotina_id=rotina["id"], fields={"active": False})
             await interaction.response.send_message("Rotina pausada.", ephemeral=True)
 
         @admin_group.command(name="retomar", description="Retoma uma rotina")
@@ -1861,7 +2892,9 @@ class CerebrosoBot(commands.Bot):
                 await interaction.response.send_message("Rotina não encontrada.", ephemeral=True)
                 return
             rotina["active"] = True
-            await self.store.save_data()
+            self._schedule_rotina_enrollments(rotina)
+            self._schedule_announcement(rotina)
+            self.store.append_op("rotina_updated", rotina_id=rotina["id"], fields={"active": True})
             await interaction.response.send_message("Rotina retomada.", ephemeral=True)
 
         @admin_group.command(name="deletar", description="Remove uma rotina")
@@ -1875,7 +2908,9 @@ class CerebrosoBot(commands.Bot):
                 await interaction.response.send_message("Rotina não encontrada.", ephemeral=True)
                 return
             self.store.data.get("global_habits", []).remove(rotina)
-            await self.store.save_data()
+            self._unindex_rotina(rotina)
+            self._unschedule_rotina(rotina)
+            self.store.append_op("rotina_deleted", rotina_id=rotina["id"])
             await interaction.response.send_message("Rotina deletada.", ephemeral=True)
 
         @admin_group.command(name="editar", description="Edita uma rotina")
@@ -1896,21 +2931,28 @@ class CerebrosoBot(commands.Bot):
             if not rotina:
                 await interaction.response.send_message("Rotina não encontrada.", ephemeral=True)
                 return
-            if nome:
-                rotina["name"] = nome
-            if emoji:
-                rotina["emoji"] = emoji
-            if cargo is not None:
-                rotina["role_id"] = cargo.id
-            if canal is not None:
-                rotina["channel_id"] = canal.id
+            fields: Dict[str, Any] = {}
             if horarios is not None:
                 times = hhmm_list_from_csv(horarios)
                 if times is None:
                     await interaction.response.send_message("Horários inválidos.", ephemeral=True)
                     return
-                rotina["times"] = times
-            await self.store.save_data()
+                fields["times"] = times
+            if nome:
+                fields["name"] = nome
+            if emoji:
+                fields["emoji"] = emoji
+            if cargo is not None:
+                fields["role_id"] = cargo.id
+            if canal is not None:
+                fields["channel_id"] = canal.id
+            if "name" in fields:
+                self._unindex_rotina(rotina)
+            rotina.update(fields)
+            if "name" in fields:
+                self._index_rotina(rotina)
+            self._schedule_announcement(rotina)
+            self.store.append_op("rotina_updated", rotina_id=rotina["id"], fields=fields)
             await interaction.response.send_message("Rotina atualizada.", ephemeral=True)
 
         @admin_group.command(name="remover_membro", description="Remove um membro de uma rotina")
@@ -1927,14 +2969,13 @@ class CerebrosoBot(commands.Bot):
             if not rotina:
                 await interaction.response.send_message("Rotina não encontrada.", ephemeral=True)
                 return
-            enrollments = rotina.setdefault("enrollments", {})
-            if not enrollments.pop(str(membro.id), None):
+            if not self._drop_enrollment(rotina, str(membro.id)):
                 await interaction.response.send_message(
                     f"{membro.mention} não está inscrito nessa rotina.",
                     ephemeral=True,
                 )
                 return
-            await self.store.save_data()
+            self.store.append_op("enrollment_removed", rotina_id=rotina["id"], user_id=membro.id)
             await interaction.response.send_message(
                 f"{membro.mention} foi removido da rotina **{rotina.get('name', 'Rotina')}**.",
                 ephemeral=True,
@@ -1962,18 +3003,23 @@ class CerebrosoBot(commands.Bot):
             streak_roles = achievements.setdefault("streak_roles", [])
             updated = False
             for item in streak_roles:
-                if int(item.get("days", 0)) == dias:
+                if item["days"] == dias:
                     item["role_id"] = cargo.id
                     updated = True
                     break
             if not updated:
-                streak_roles.append({"days": dias, "role_id": cargo.id})
-            streak_roles.sort(key=lambda entry: int(entry.get("days", 0)))
-            await self.store.save_data()
+                # A lista já fica ordenada por dias; basta inserir na posição certa.
+                bisect.insort(
+                    streak_roles,
+                    {"days": dias, "role_id": cargo.id},
+                    key=operator.itemgetter("days"),
+                )
+            self.store.mark_dirty()
+            # Os cargos são aplicados em segundo plano enquanto a resposta da interação segue.
+            self._spawn(self._process_rotina_achievements_and_save(rotina, interaction.user.id))
             await interaction.response.send_message(
                 f"Cargo configurado para streak de {dias} dias.", ephemeral=True
             )
-            self.loop.create_task(self._process_rotina_achievements_and_save(rotina, interaction.user.id))
 
         @admin_group.command(name="conquista_streak_remover", description="Remove cargo de streak")
         @rotina_autocomplete
@@ -1991,12 +3037,12 @@ class CerebrosoBot(commands.Bot):
                 return
             achievements, _ = self._ensure_rotina_achievements(rotina)
             streak_roles = achievements.setdefault("streak_roles", [])
-            before = len(streak_roles)
-            streak_roles[:] = [item for item in streak_roles if int(item.get("days", 0)) != dias]
-            if len(streak_roles) == before:
+            idx = next((i for i, item in enumerate(streak_roles) if item["days"] == dias), -1)
+            if idx < 0:
                 await interaction.response.send_message("Nenhum cargo configurado para esse streak.", ephemeral=True)
                 return
-            await self.store.save_data()
+            del streak_roles[idx]
+            self.store.mark_dirty()
             await interaction.response.send_message("Cargo removido das conquistas de streak.", ephemeral=True)
 
         @admin_group.command(name="conquista_topmensal", description="Configura cargo para o top mensal")
@@ -2018,9 +3064,9 @@ class CerebrosoBot(commands.Bot):
             monthly["role_id"] = cargo.id
             monthly["winner_id"] = None
             monthly["month"] = None
-            await self.store.save_data()
+            self.store.mark_dirty()
+            self._spawn(self._process_rotina_achievements_and_save(rotina, interaction.user.id))
             await interaction.response.send_message("Cargo configurado para o top mensal.", ephemeral=True)
-            self.loop.create_task(self._process_rotina_achievements_and_save(rotina, interaction.user.id))
 
         @admin_group.command(name="conquista_topmensal_remover", description="Remove o cargo de top mensal")
         @rotina_autocomplete
@@ -2042,10 +3088,10 @@ class CerebrosoBot(commands.Bot):
             monthly["role_id"] = None
             monthly["winner_id"] = None
             monthly["month"] = None
-            await self.store.save_data()
+            self.store.mark_dirty()
             await interaction.response.send_message("Cargo de top mensal removido.", ephemeral=True)
             if role_id:
-                self.loop.create_task(self._remove_rotina_role(rotina, role_id, winner_id))
+                self._spawn(self._remove_rotina_role(rotina, role_id, winner_id))
 
         @group.command(name="listar", description="Mostra as rotinas disponíveis")
         async def listar(interaction: discord.Interaction) -> None:
@@ -2106,13 +3152,12 @@ class CerebrosoBot(commands.Bot):
             if not rotina:
                 await interaction.response.send_message("Rotina não encontrada.", ephemeral=True)
                 return
-            enroll = rotina.setdefault("enrollments", {})
-            prefs = enroll.setdefault(str(interaction.user.id), {"quiet": {"start": "06:00", "end": "23:00"}})
+            prefs = self._enrollment_prefs(rotina, str(interaction.user.id))
             prefs["dm"] = dm if dm is not None else prefs.get("dm", True)
             prefs["interval_min"] = max(5, intervalo_minutos or prefs.get("interval_min", 90))
-            prefs.setdefault("quiet", {"start": "06:00", "end": "23:00"})
             prefs["next_ts"] = int(time.time())
-            await self.store.save_data()
+            self._schedule_enrollment(rotina, str(interaction.user.id))
+            self.store.append_op("enrollment_set", rotina_id=rotina["id"], user_id=interaction.user.id, prefs=prefs)
             await interaction.response.send_message("Inscrição registrada!", ephemeral=True)
 
         @group.command(name="sair", description="Remove sua participação")
@@ -2122,9 +3167,8 @@ class CerebrosoBot(commands.Bot):
             if not rotina:
                 await interaction.response.send_message("Rotina não encontrada.", ephemeral=True)
                 return
-            enroll = rotina.setdefault("enrollments", {})
-            if enroll.pop(str(interaction.user.id), None):
-                await self.store.save_data()
+            if self._drop_enrollment(rotina, str(interaction.user.id)):
+                self.store.append_op("enrollment_removed", rotina_id=rotina["id"], user_id=interaction.user.id)
                 await interaction.response.send_message("Você saiu da rotina.", ephemeral=True)
             else:
                 await interaction.response.send_message("Você não estava inscrito.", ephemeral=True)
@@ -2143,8 +3187,7 @@ class CerebrosoBot(commands.Bot):
             if not rotina:
                 await interaction.response.send_message("Rotina não encontrada.", ephemeral=True)
                 return
-            enroll = rotina.setdefault("enrollments", {})
-            prefs = enroll.setdefault(str(interaction.user.id), {"quiet": {"start": "06:00", "end": "23:00"}})
+            prefs = self._enrollment_prefs(rotina, str(interaction.user.id))
             if intervalo_minutos is not None:
                 if intervalo_minutos < 5:
                     await interaction.response.send_message("Intervalo mínimo é 5 minutos.", ephemeral=True)
@@ -2152,7 +3195,7 @@ class CerebrosoBot(commands.Bot):
                 prefs["interval_min"] = intervalo_minutos
             if dm is not None:
                 prefs["dm"] = dm
-            quiet = prefs.setdefault("quiet", {"start": "06:00", "end": "23:00"})
+            quiet = prefs["quiet"]
             if janela_inicio:
                 if not parse_hhmm(janela_inicio):
                     await interaction.response.send_message("Horário inválido.", ephemeral=True)
@@ -2163,14 +3206,17 @@ class CerebrosoBot(commands.Bot):
                     await interaction.response.send_message("Horário inválido.", ephemeral=True)
                     return
                 quiet["end"] = janela_fim
-            await self.store.save_data()
+            self._schedule_enrollment(rotina, str(interaction.user.id))
+            self.store.append_op("enrollment_set", rotina_id=rotina["id"], user_id=interaction.user.id, prefs=prefs)
             await interaction.response.send_message("Preferências atualizadas!", ephemeral=True)
 
         @group.command(name="meus", description="Lista suas inscrições")
         async def meus(interaction: discord.Interaction) -> None:
             lines = []
-            for rotina in self.store.data.get("global_habits", []):
-                prefs = rotina.get("enrollments", {}).get(str(interaction.user.id))
+            user_id_str = str(interaction.user.id)
+            for rotina_id in sorted(self._enrollments_by_user.get(user_id_str, ())):
+                rotina = self._rotina_by_id.get(rotina_id)
+                prefs = rotina.get("enrollments", _EMPTY).get(user_id_str) if rotina else None
                 if not prefs:
                     continue
                 lines.append(
@@ -2213,47 +3259,64 @@ class CerebrosoBot(commands.Bot):
         return embed
 
     def _rotina_stats(self, rotina: Dict[str, Any]) -> List[Tuple[int, Dict[str, int]]]:
-        confirmations = rotina.get("confirmations", {})
+        # Válido até a próxima confirmação da rotina ou até a janela de 30 dias andar.
         cutoff = utcnow().date() - timedelta(days=29)
-        per_user: Dict[int, Dict[str, int]] = defaultdict(lambda: {"total": 0, "streak": 0, "last_day": None})
-        for day in sorted(confirmations.keys()):
-            day_date = datetime.fromisoformat(day).date()
-            if day_date < cutoff:
+        cached = self._rotina_stats_cache.get(rotina["id"])
+        if cached is not None and cached[0] == cutoff:
+            return cached[1]
+        confirmations = rotina.get("confirmations", {})
+        # Chaves ISO ordenam como datas: dias fora da janela nem chegam a ser convertidos.
+        cutoff_key = cutoff.isoformat()
+        per_user: Dict[int, Dict[str, Any]] = {}
+        for day in sorted(confirmations):
+            if day < cutoff_key:
                 continue
-            users = confirmations.get(day, {})
-            for user_id_str, confirmed in users.items():
+            day_ord = day_key_to_ordinal(day)
+            for user_id_str, confirmed in confirmations[day].items():
                 if not confirmed:
                     continue
                 user_id = int(user_id_str)
-                info = per_user[user_id]
+                info = per_user.get(user_id)
+                if info is None:
+                    info = per_user[user_id] = {"total": 0, "streak": 0, "last_ord": None}
                 info["total"] += 1
-                last_day = info.get("last_day")
-                if last_day is None or day_date - last_day > timedelta(days=1):
+                last_ord = info["last_ord"]
+                diff = day_ord - last_ord if last_ord is not None else 2
+                if diff > 1:
                     info["streak"] = 1
-                elif day_date - last_day == timedelta(days=1):
+                elif diff == 1:
                     info["streak"] += 1
                 else:
                     info["streak"] = max(info["streak"], 1)
-                info["last_day"] = day_date
+                info["last_ord"] = day_ord
         for info in per_user.values():
-            info.pop("last_day", None)
+            del info["last_ord"]
         sorted_users = sorted(
             per_user.items(),
             key=lambda item: (item[1].get("streak", 0), item[1].get("total", 0)),
             reverse=True,
         )
+        self._rotina_stats_cache[rotina["id"]] = (cutoff, sorted_users)
         return sorted_users
 
     def _build_global_leaderboard(self, guild_id: Optional[int]) -> discord.Embed:
         embed = discord.Embed(title="Leaderboard Geral — Rotinas", colour=discord.Colour.blue())
         per_user: Dict[int, Dict[str, int]] = defaultdict(lambda: {"total": 0, "streak": 0})
-        for rotina in self.store.data.get("global_habits", []):
+        rotinas = self.store.data.get("global_habits", [])
+        stats_by_rotina: Dict[int, Dict[int, Dict[str, int]]] = {}
+        # Várias rotinas costumam dividir o mesmo canal: resolve cada canal uma vez por chamada.
+        guild_of: Dict[int, Optional[int]] = {}
+        for rotina in rotinas:
             channel_id = rotina.get("channel_id")
             if guild_id and channel_id:
-                channel = self.get_channel(channel_id)
-                if channel and isinstance(channel, discord.abc.GuildChannel) and channel.guild.id != guild_id:
+                if channel_id not in guild_of:
+                    channel = self.get_channel(channel_id)
+                    guild_of[channel_id] = channel.guild.id if isinstance(channel, discord.abc.GuildChannel) else None
+                owner_guild = guild_of[channel_id]
+                if owner_guild is not None and owner_guild != guild_id:
                     continue
             stats = self._rotina_stats(rotina)
+            stats_by_rotina[rotina["id"]] = dict(stats)
             for user_id, info in stats:
                 agg = per_user[user_id]
                 agg["total"] += info["total"]
@@ -2261,7 +3324,7 @@ class CerebrosoBot(commands.Bot):
         if not per_user:
             embed.description = "Sem dados suficientes ainda."
             return embed
-        top = sorted(per_user.items(), key=lambda i: (i[1]["total"], i[1]["streak"]), reverse=True)[:10]
+        top = heapq.nlargest(10, per_user.items(), key=lambda i: (i[1]["total"], i[1]["streak"]))
         lines = []
         for idx, (user_id, info) in enumerate(top, start=1):
             lines.append(f"#{idx} <@{user_id}> — 30d: {info['total']} — streaks somados: {info['streak']}")
@@ -2269,8 +3332,11 @@ class CerebrosoBot(commands.Bot):
         if top:
             top_user = top[0][0]
             destaque = []
-            for rotina in self.store.data.get("global_habits", []):
-                stats_dict = dict(self._rotina_stats(rotina))
+            for rotina in rotinas:
+                # Só as rotinas que entraram no ranking acima; nenhuma estatística é recalculada.
+                stats_dict = stats_by_rotina.get(rotina["id"])
+                if stats_dict is None:
+                    continue
                 info = stats_dict.get(top_user)
                 if info:
                     destaque.append(f"{rotina['name']}: {info['total']}")
@@ -2284,7 +3350,7 @@ class CerebrosoBot(commands.Bot):
 def has_manage_permission(user: discord.abc.User) -> bool:
     if isinstance(user, discord.Member):
         perms = user.guild_permissions
-        return perms.manage_guild or perms.manage_roles or perms.administrator
+        return perms.administrator or perms.manage_guild or perms.manage_roles
     return False
 
 
@@ -2298,11 +3364,13 @@ def default_pomodoro_config() -> Dict[str, int]:
 
 
 bot = CerebrosoBot()
-bot.tree.add_command(bot.pomodoro_group)
-bot.tree.add_command(bot.lembrete_group)
-bot.tree.add_command(bot.habito_group)
-bot.tree.add_command(bot.rotina_group)
 
 
 if __name__ == "__main__":
+    try:
+        import uvloop
+    except ImportError:
+        pass
+    else:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
     bot.run(config.DISCORD_TOKEN)